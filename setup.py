@@ -32,6 +32,9 @@ setup(
     packages=find_packages(where="src"),
     install_requires=requirements,
     extras_require={
+        "fast": [
+            "orjson>=3.6.0",
+        ],
         "test": [
             "pytest>=7.0.0",
             "pytest-asyncio>=0.21.0",
@@ -11,43 +11,35 @@ __author__ = "narko contributors"
 from .config import Config
 from .utils import TextProcessor, EmbeddingGenerator
 
-# Lazy imports for components with dependencies
-def _lazy_import():
-    """Lazy import function for components requiring external dependencies"""
-    imports = {}
-    
-    try:
-        from .utils import UploadCache, FileValidator
-        imports['UploadCache'] = UploadCache
-        imports['FileValidator'] = FileValidator
-    except ImportError:
-        pass
-    
+# Components with external dependencies, imported on first attribute access
+_LAZY_IMPORTS = {
+    'UploadCache': ('.utils', 'UploadCache'),
+    'BlockCache': ('.utils', 'BlockCache'),
+    'FileValidator': ('.utils', 'FileValidator'),
+    'NotionExtension': ('.extensions', 'NotionExtension'),
+    'NotionClient': ('.notion', 'NotionClient'),
+    'FileUploader': ('.notion', 'FileUploader'),
+    'ExternalImporter': ('.notion', 'ExternalImporter'),
+    'NotionConverter': ('.converter', 'NotionConverter'),
+}
+
+
+def __getattr__(name):
+    """Import lazily exported components on first access (PEP 562)"""
     try:
-        from .extensions import NotionExtension
-        imports['NotionExtension'] = NotionExtension
-    except ImportError:
-        pass
+        module_name, attr = _LAZY_IMPORTS[name]
+    except KeyError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
     
-    try:
-        from .notion import NotionClient, FileUploader, ExternalImporter
-        imports['NotionClient'] = NotionClient
-        imports['FileUploader'] = FileUploader
-        imports['ExternalImporter'] = ExternalImporter
-    except ImportError:
-        pass
-        
-    try:
-        from .converter import NotionConverter
-        imports['NotionConverter'] = NotionConverter
-    except ImportError:
-        pass
-        
-    return imports
+    from importlib import import_module
+    value = getattr(import_module(module_name, __name__), attr)
+    globals()[name] = value  # Later lookups skip __getattr__
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_IMPORTS))
 
-# Make lazy imports available at module level
-_available_imports = _lazy_import()
-globals().update(_available_imports)
 
 # Add main function for CLI compatibility
 def main():
@@ -69,5 +61,5 @@ __all__ = [
     "TextProcessor", 
     "EmbeddingGenerator",
     "main",
-    # Conditionally available (if dependencies present)
-] + list(_available_imports.keys())
\ No newline at end of file
+    # Imported on first access
+] + list(_LAZY_IMPORTS)
\ No newline at end of file
@@ -0,0 +1,268 @@
+"""
+narko application - file processing and Notion import shared by the CLI entry points
+"""
+
+import os
+import sys
+import mmap
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+from .config import Config
+from .utils import UploadCache, BlockCache, FileValidator
+from .utils.fastglob import iter_glob
+
+# Concurrent Notion uploads when importing a directory
+UPLOAD_WORKERS = 8
+
+# Per-process app used by directory parsing workers
+_worker_app = None
+
+
+def _init_worker(use_block_cache: bool = True, upload_files: bool = False):
+    """Build one NarkoApp per parsing process"""
+    global _worker_app
+    _worker_app = NarkoApp(upload_files=upload_files)
+    _worker_app.block_cache.is_enabled = use_block_cache
+
+
+def _process_in_worker(file_path: str, parent_id: str = None) -> dict:
+    """Parse and convert a file inside a worker process"""
+    return _worker_app.process_file(file_path, parent_id)
+
+
+def load_config() -> Config:
+    """Load configuration from the environment, exiting with guidance on failure"""
+    try:
+        return Config.from_env()
+    except ValueError as e:
+        print(f"Configuration error: {e}")
+        print("Please check your .env file for NOTION_API_KEY and NOTION_IMPORT_ROOT")
+        sys.exit(1)
+
+
+def show_cache_info(cache: UploadCache):
+    """Show upload cache information"""
+    stats = cache.get_stats()
+    print(f"📊 Upload Cache Statistics:")
+    print(f"   Cached files: {stats['cached_files']}")
+    
+    if stats['cached_files'] > 0:
+        print(f"   Total size: {stats['total_size_bytes']:,} bytes ({stats['total_size_mb']:.1f} MB)")
+        print(f"   Cache file: {stats['cache_file']}")
+        print(f"   TTL: {stats['ttl_hours']} hours")
+    else:
+        print("   No cached uploads found")
+
+
+class NarkoApp:
+    """Main narko application with modular architecture"""
+    
+    __slots__ = (
+        'config', 'notion_client', 'file_uploader', 'external_importer',
+        'cache', 'block_cache', 'validator', 'converter',
+    )
+    
+    def __init__(self, upload_files: bool = False):
+        """Set up components; ``upload_files`` uploads documents' local files to Notion"""
+        self.config = load_config()
+        
+        # Marko and the HTTP clients are imported here rather than at module
+        # level so cache maintenance and --help never load them
+        from .converter import NotionConverter
+        from .notion import NotionClient, FileUploader, ExternalImporter
+        
+        # Initialize components
+        self.notion_client = NotionClient(self.config)
+        self.file_uploader = FileUploader(self.config)
+        # External imports talk to the same API host, so reuse the client's connections
+        self.external_importer = ExternalImporter(self.config, session=self.notion_client.session)
+        self.cache = UploadCache(self.config)
+        self.block_cache = BlockCache(self.config)
+        self.validator = FileValidator(self.config)
+        self.converter = NotionConverter(self.config, self.file_uploader, self.external_importer,
+                                         upload_files=upload_files)
+    
+    @property
+    def markdown(self):
+        """Markdown parser with extensions, shared per thread"""
+        from .extensions import get_markdown
+        return get_markdown()
+    
+    def process_file(self, file_path: str, parent_id: str = None) -> dict:
+        """Process a markdown file using modular components"""
+        if not os.path.exists(file_path):
+            return {"error": f"File not found: {file_path}"}
+
+        # Map the file so hashing and decoding read the page cache directly
+        # instead of first copying the whole file into a bytes object
+        with open(file_path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size:
+                raw = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            else:
+                raw = b''  # Empty files cannot be mapped
+
+            try:
+                # Unchanged sources reuse their previously converted blocks
+                source_hash = self.block_cache.source_hash(raw)
+                blocks = self.block_cache.get(source_hash)
+
+                if blocks is None:
+                    # Parse to AST using Marko extensions
+                    ast = self.markdown.parse(str(raw, 'utf-8'))
+
+                    # Convert to Notion blocks using converter
+                    blocks = self.converter.convert(ast)
+                    # Blocks for local files depend on the files and on uploads
+                    # that may have failed, so only self-contained documents
+                    # are cached
+                    if not self.converter.references_local_files:
+                        self.block_cache.set(source_hash, blocks)
+            finally:
+                if isinstance(raw, mmap.mmap):
+                    raw.close()
+
+        title = os.path.splitext(os.path.basename(file_path))[0]
+
+        return {
+            "title": title,
+            "parent_id": parent_id,  # No fallback - must be explicit
+            "blocks": blocks,
+            "file_path": file_path
+        }
+    
+    def import_to_notion(self, result: dict, mode: str = 'create') -> dict:
+        """Import processed result to Notion with multiple modes
+        
+        Args:
+            result: Processed file result
+            mode: Import mode - 'create', 'append', 'replace_all', 'replace_content'
+        """
+        try:
+            if mode == 'append':
+                # Append blocks to existing page
+                response = self.notion_client.append_blocks(
+                    result['parent_id'],
+                    result['blocks']
+                )
+                response['mode'] = 'append'
+                
+            elif mode == 'replace_all':
+                # Replace ALL blocks on the page (including sub-pages)
+                response = self.notion_client.replace_all_blocks(
+                    result['parent_id'],
+                    result['blocks']
+                )
+                
+            elif mode == 'replace_content':
+                # Replace content blocks but preserve sub-pages
+                response = self.notion_client.replace_content_blocks(
+                    result['parent_id'],
+                    result['blocks']
+                )
+                
+            else:
+                # Create new sub-page (default)
+                response = self.notion_client.create_page(
+                    result['parent_id'], 
+                    result['title'], 
+                    result['blocks']
+                )
+                response['mode'] = 'create'
+                return response
+            
+            # Add page URL for consistency with create
+            response['url'] = f"https://www.notion.so/{result['parent_id'].replace('-', '')}"
+            return response
+        except Exception as e:
+            return {"error": str(e)}
+    
+    def find_markdown_files(self, directory: str) -> list:
+        """Recursively list markdown files under a directory"""
+        files = []
+        for root, dirs, names in os.walk(directory):
+            dirs.sort()
+            files.extend(os.path.join(root, name) for name in sorted(names) if name.endswith('.md'))
+        return files
+    
+    def process_directory(self, directory: str, parent_id: str = None, do_import: bool = False,
+                          concurrency: int = UPLOAD_WORKERS) -> list:
+        """Process every markdown file in a directory, optionally importing each to Notion"""
+        return self.process_many(self.find_markdown_files(directory), parent_id, do_import, concurrency)
+    
+    def process_many(self, files: list, parent_id: str = None, do_import: bool = False,
+                     concurrency: int = UPLOAD_WORKERS) -> list:
+        """Process many markdown files, optionally importing each to Notion
+        
+        Parsing fans out across processes; imports are network-bound and fan out
+        across up to ``concurrency`` threads as soon as each file finishes converting.
+        """
+        results = []
+        if not files:
+            return results
+        
+        with ProcessPoolExecutor(max_workers=os.cpu_count(), initializer=_init_worker,
+                                 initargs=(self.block_cache.is_enabled, self.converter.upload_files)) as parse_pool, \
+                ThreadPoolExecutor(max_workers=concurrency) as upload_pool:
+            parse_futures = {parse_pool.submit(_process_in_worker, path, parent_id): path for path in files}
+            upload_futures = {}
+            
+            for future in as_completed(parse_futures):
+                path = parse_futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    result = {"error": str(e)}
+                # Errors from process_file (e.g. a missing file) carry no path
+                result.setdefault("file_path", path)
+                
+                if do_import and "error" not in result:
+                    upload_futures[upload_pool.submit(self.import_to_notion, result)] = result
+                else:
+                    results.append(result)
+            
+            for future in as_completed(upload_futures):
+                result = upload_futures[future]
+                result["response"] = future.result()
+                results.append(result)
+        
+        return results
+    
+    def show_cache_info(self):
+        """Show upload cache information"""
+        show_cache_info(self.cache)
+    
+    def cleanup_cache(self) -> int:
+        """Clean expired cache entries"""
+        return self.cache.cleanup()
+    
+    def validate_files(self, pattern: str):
+        """Validate files matching pattern"""
+        files = list(iter_glob(pattern))
+        if not files:
+            print(f"No files found matching: {pattern}")
+            return
+        
+        print(f"🔍 Validating {len(files)} file(s)...")
+        valid_count = 0
+        
+        # Validation is hashing and stat I/O (hashlib releases the GIL), so
+        # threads overlap it; map keeps results in input order for output
+        with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+            results = executor.map(self.validator.validate_file, files)
+        
+        for file_path, result in zip(files, results):
+            status = "✅" if result['valid'] else "❌"
+            print(f"{status} {file_path}")
+            
+            if result['errors']:
+                for error in result['errors']:
+                    print(f"   ❌ {error}")
+            
+            if result['warnings']:
+                for warning in result['warnings']:
+                    print(f"   ⚠️  {warning}")
+            
+            if result['valid']:
+                valid_count += 1
+        
+        print(f"\n📊 Validation Summary: {valid_count}/{len(files)} files valid")
@@ -6,19 +6,18 @@ narko CLI module - Main command line interface
 import sys
 import os
 import argparse
+import functools
 import logging
+from itertools import islice
 from pathlib import Path
 
 # Add src to path for imports when running as script
 if __name__ == "__main__":
     sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from narko import Config, NotionExtension, NotionClient
-from narko.converter import NotionConverter
-from narko.notion import FileUploader, ExternalImporter
-from narko.utils import UploadCache, FileValidator
-from marko import Markdown
-from marko.ext import gfm
+from narko.app import NarkoApp, UPLOAD_WORKERS, load_config, show_cache_info
+from narko.utils import UploadCache
+from narko.utils.fastglob import iter_glob
 
 # Setup logging
 logging.basicConfig(
@@ -27,114 +26,24 @@ logging.basicConfig(
 )
 logger = logging.getLogger('narko')
 
+# Notion block types that carry an uploaded or external file
+_FILE_BLOCK_TYPES = frozenset({'file', 'image', 'video', 'pdf', 'audio'})
 
-class NarkoApp:
-    """Main narko application with modular architecture"""
-    
-    def __init__(self):
-        try:
-            self.config = Config.from_env()
-        except ValueError as e:
-            print(f"Configuration error: {e}")
-            print("Please check your .env file for NOTION_API_KEY and NOTION_IMPORT_ROOT")
-            sys.exit(1)
-        
-        # Initialize components
-        self.notion_client = NotionClient(self.config)
-        self.file_uploader = FileUploader(self.config)
-        self.external_importer = ExternalImporter(self.config)
-        self.cache = UploadCache(self.config)
-        self.validator = FileValidator(self.config)
-        self.converter = NotionConverter(self.config, self.file_uploader, self.external_importer)
-        
-        # Setup markdown parser with extensions
-        self.markdown = Markdown(extensions=[NotionExtension, gfm.GFM])
-    
-    def process_file(self, file_path: str, parent_id: str = None) -> dict:
-        """Process a markdown file using modular components"""
-        if not os.path.exists(file_path):
-            return {"error": f"File not found: {file_path}"}
-
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-
-        # Parse to AST using Marko extensions
-        ast = self.markdown.parse(content)
-
-        # Convert to Notion blocks using converter
-        blocks = self.converter.convert(ast)
 
-        title = os.path.splitext(os.path.basename(file_path))[0]
-
-        return {
-            "title": title,
-            "parent_id": parent_id,  # No fallback - must be explicit
-            "blocks": blocks,
-            "file_path": file_path
-        }
-    
-    def import_to_notion(self, result: dict) -> dict:
-        """Import processed result to Notion"""
-        try:
-            response = self.notion_client.create_page(
-                result['parent_id'], 
-                result['title'], 
-                result['blocks']
-            )
-            return response
-        except Exception as e:
-            return {"error": str(e)}
-    
-    def show_cache_info(self):
-        """Show upload cache information"""
-        stats = self.cache.get_stats()
-        print(f"📊 Upload Cache Statistics:")
-        print(f"   Cached files: {stats['cached_files']}")
-        
-        if stats['cached_files'] > 0:
-            print(f"   Total size: {stats['total_size_bytes']:,} bytes ({stats['total_size_mb']:.1f} MB)")
-            print(f"   Cache file: {stats['cache_file']}")
-            print(f"   TTL: {stats['ttl_hours']} hours")
-        else:
-            print("   No cached uploads found")
-    
-    def cleanup_cache(self) -> int:
-        """Clean expired cache entries"""
-        return self.cache.cleanup()
-    
-    def validate_files(self, pattern: str):
-        """Validate files matching pattern"""
-        from glob import glob
-        
-        files = glob(pattern)
-        if not files:
-            print(f"No files found matching: {pattern}")
-            return
-        
-        print(f"🔍 Validating {len(files)} file(s)...")
-        valid_count = 0
-        
-        for file_path in files:
-            result = self.validator.validate_file(file_path)
-            status = "✅" if result['valid'] else "❌"
-            print(f"{status} {file_path}")
-            
-            if result['errors']:
-                for error in result['errors']:
-                    print(f"   ❌ {error}")
-            
-            if result['warnings']:
-                for warning in result['warnings']:
-                    print(f"   ⚠️  {warning}")
-            
-            if result['valid']:
-                valid_count += 1
-        
-        print(f"\n📊 Validation Summary: {valid_count}/{len(files)} files valid")
+def _positive_int(value: str) -> int:
+    """argparse type for options that need a count of at least 1"""
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid int value: {value!r}")
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {number}")
+    return number
 
 
-def main():
-    """Main CLI interface"""
+@functools.lru_cache(maxsize=1)
+def build_parser() -> argparse.ArgumentParser:
+    """Build the CLI argument parser, once per process"""
     parser = argparse.ArgumentParser(
         description='narko v2.0 - Modular Notion extension and uploader for marko',
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -148,6 +57,11 @@ Modular Architecture:
 
 Examples:
   narko --file document.md --parent PAGE_ID --import   # Import single file (--parent required!)
+  narko --dir vault/ --parent PAGE_ID --import        # Import every .md under a directory
+  narko --files "notes/*.md" --parent PAGE_ID --import # Import files matching a pattern
+  narko --file doc.md --parent PAGE_ID --import --append           # Append to existing page
+  narko --file doc.md --parent PAGE_ID --import --replace-all      # Replace ALL content
+  narko --file doc.md --parent PAGE_ID --import --replace-content  # Replace content, keep sub-pages
   narko --validate "*.md"                              # Validate files
   narko --cache-info                                   # Show cache stats
   narko --file doc.md --test --show-embeddings         # Test with analysis
@@ -156,16 +70,27 @@ Examples:
     
     # File input options
     parser.add_argument('--file', help='Process and optionally import a specific file')
+    parser.add_argument('--dir', help='Process and optionally import all markdown files under a directory')
+    parser.add_argument('--files', help='Process and optionally import all files matching a glob pattern')
     parser.add_argument('--parent', help='Parent page ID to import into (REQUIRED with --import)')
     parser.add_argument('--validate', help='Validate files using glob pattern')
     
     # Processing options
     parser.add_argument('--test', action='store_true', help='Test mode - show processed blocks without importing')
     parser.add_argument('--import', dest='do_import', action='store_true', help='Import to Notion')
-    parser.add_argument('--upload-files', action='store_true', help='Enable file uploads for local files')
+    # Mode selection (mutually exclusive)
+    mode_group = parser.add_mutually_exclusive_group()
+    mode_group.add_argument('--append', action='store_true', help='Append content to existing page')
+    mode_group.add_argument('--replace-all', action='store_true', help='Replace ALL content on page (including sub-pages)')
+    mode_group.add_argument('--replace-content', action='store_true', help='Replace content but preserve sub-pages (append below sub-pages)')
+    parser.add_argument('--upload-files', action='store_true',
+                        help='Upload local files referenced by the markdown (with --import)')
+    parser.add_argument('--concurrency', type=_positive_int, default=UPLOAD_WORKERS,
+                        help=f'Concurrent Notion imports for --dir/--files (default: {UPLOAD_WORKERS})')
     parser.add_argument('--show-embeddings', action='store_true', help='Show embedding analysis')
     
     # Cache and maintenance
+    parser.add_argument('--no-cache', action='store_true', help='Re-convert files instead of reusing cached blocks')
     parser.add_argument('--cache-info', action='store_true', help='Show cache statistics')
     parser.add_argument('--cache-cleanup', action='store_true', help='Clean expired cache entries')
     
@@ -174,44 +99,92 @@ Examples:
                        default='INFO', help='Set logging level')
     parser.add_argument('--verbose', '-v', action='store_true', help='Verbose output')
     
+    return parser
+
+
+def main():
+    """Main CLI interface"""
+    parser = build_parser()
     args = parser.parse_args()
     
     # Configure logging
     log_level = logging.DEBUG if args.verbose else getattr(logging, args.log_level)
     logging.getLogger().setLevel(log_level)
     
-    # Initialize app
-    try:
-        app = NarkoApp()
-    except SystemExit:
+    # Handle cache operations with just the config and upload cache
+    if args.cache_info or args.cache_cleanup:
+        try:
+            cache = UploadCache(load_config())
+        except SystemExit:
+            return
+        
+        if args.cache_info:
+            show_cache_info(cache)
+        else:
+            cleaned = cache.cleanup()
+            print(f"🧹 Cache cleanup completed: {cleaned} entries remaining")
         return
     
-    # Handle cache operations
-    if args.cache_info:
-        app.show_cache_info()
+    # Initialize app; local files are only uploaded for an actual import
+    try:
+        app = NarkoApp(upload_files=args.upload_files and args.do_import)
+    except SystemExit:
         return
     
-    if args.cache_cleanup:
-        cleaned = app.cleanup_cache()
-        print(f"🧹 Cache cleanup completed: {cleaned} entries remaining")
-        return
+    if args.no_cache:
+        app.block_cache.is_enabled = False
     
     # Handle file validation
     if args.validate:
         app.validate_files(args.validate)
         return
     
-    # Handle file processing
-    if args.file:
-        # Check if --import is used without --parent
-        if args.do_import and not args.parent:
-            print("❌ Error: --parent is required when using --import")
-            print("   Usage: narko --file document.md --parent PAGE_ID --import")
-            print("   Where PAGE_ID can be:")
-            print("   - A Notion page URL: https://notion.so/My-Page-abc123...")
-            print("   - A page ID: abc123def456...")
+    # Check if --import is used without --parent
+    if (args.file or args.dir or args.files) and args.do_import and not args.parent:
+        print("❌ Error: --parent is required when using --import")
+        print("   Usage: narko --file document.md --parent PAGE_ID --import")
+        print("   Where PAGE_ID can be:")
+        print("   - A Notion page URL: https://notion.so/My-Page-abc123...")
+        print("   - A page ID: abc123def456...")
+        return
+    
+    # Handle multi-file processing
+    if args.dir or args.files:
+        if args.append or args.replace_all or args.replace_content:
+            print("❌ Error: --append/--replace-all/--replace-content only apply to --file")
             return
 
+        if args.dir and not os.path.isdir(args.dir):
+            print(f"❌ Error: Directory not found: {args.dir}")
+            return
+        
+        parent_id = app.notion_client.extract_page_id(args.parent) if args.parent else None
+        if args.dir:
+            results = app.process_directory(args.dir, parent_id, args.do_import, args.concurrency)
+        else:
+            files = list(iter_glob(args.files))
+            if not files:
+                print(f"No files found matching: {args.files}")
+                return
+            results = app.process_many(files, parent_id, args.do_import, args.concurrency)
+        
+        succeeded = 0
+        for result in results:
+            response = result.get('response', {})
+            if "error" in result:
+                print(f"❌ {result['file_path']}: {result['error']}")
+            elif args.do_import and 'url' not in response:
+                print(f"❌ {result['file_path']}: Import failed: {response}")
+            else:
+                succeeded += 1
+                detail = response['url'] if args.do_import else f"{len(result['blocks'])} blocks"
+                print(f"✅ {result['file_path']}: {detail}")
+        
+        print(f"\n📊 Summary: {succeeded}/{len(results)} files succeeded")
+        return
+    
+    # Handle file processing
+    if args.file:
         parent_id = app.notion_client.extract_page_id(args.parent) if args.parent else None
         result = app.process_file(args.file, parent_id)
         
@@ -225,38 +198,67 @@ Examples:
         
         if args.test:
             print("\n📋 Processed Blocks:")
-            for i, block in enumerate(result['blocks'][:10]):  # Show first 10 blocks
-                print(f"\n{i+1}. {block['type'].upper()}")
+            for i, block in enumerate(islice(result['blocks'], 10), 1):  # Show first 10 blocks
+                block_type = block['type']
+                payload = block.get(block_type, {})
+                print(f"\n{i}. {block_type.upper()}")
                 
                 # Show block content preview
-                if 'rich_text' in block.get(block['type'], {}):
-                    texts = block[block['type']]['rich_text']
+                texts = payload.get('rich_text')
+                if texts is not None:
                     if texts and 'text' in texts[0]:
                         content = texts[0]['text']['content'][:60]
                         print(f"   📝 {content}{'...' if len(content) == 60 else ''}")
                 
-                elif block['type'] in ['image', 'video', 'pdf', 'audio', 'file']:
-                    file_info = block.get(block['type'], {})
-                    if 'external' in file_info:
-                        print(f"   🌐 External: {file_info['external']['url'][:50]}...")
-                    elif 'file_upload' in file_info:
-                        print(f"   📁 Upload ID: {file_info['file_upload']['id']}")
+                elif block_type in _FILE_BLOCK_TYPES:
+                    if 'external' in payload:
+                        print(f"   🌐 External: {payload['external']['url'][:50]}...")
+                    elif 'file_upload' in payload:
+                        print(f"   📁 Upload ID: {payload['file_upload']['id']}")
         
         if args.show_embeddings:
             # Show embedding analysis
-            file_blocks = [b for b in result['blocks'] if b['type'] in ['file', 'image', 'video', 'pdf', 'audio']]
+            file_block_count = sum(1 for b in result['blocks'] if b['type'] in _FILE_BLOCK_TYPES)
             print(f"\n🧠 Embedding Analysis:")
-            print(f"   📊 File blocks found: {len(file_blocks)}")
+            print(f"   📊 File blocks found: {file_block_count}")
             print(f"   🔍 Supported extensions: {', '.join(sorted(app.config.embedding_enabled_types))}")
         
         if args.do_import:
-            print(f"\n📤 Importing to Notion...")
-            response = app.import_to_notion(result)
+            # Determine import mode
+            if args.append:
+                mode = 'append'
+                print(f"\n📤 Appending content to existing page...")
+            elif args.replace_all:
+                mode = 'replace_all'
+                print(f"\n🔄 Replacing ALL content on page (including sub-pages)...")
+            elif args.replace_content:
+                mode = 'replace_content'
+                print(f"\n🔄 Replacing content but preserving sub-pages...")
+            else:
+                mode = 'create'
+                print(f"\n📤 Creating new sub-page...")
+            
+            response = app.import_to_notion(result, mode=mode)
             
             if 'url' in response:
-                print(f"✅ Successfully created: {response['url']}")
+                # Show operation-specific success message
+                if mode == 'append':
+                    print(f"✅ Successfully appended to: {response['url']}")
+                elif mode == 'replace_all':
+                    deleted = response.get('deleted_blocks', 0)
+                    added = response.get('added_blocks', 0)
+                    print(f"✅ Successfully replaced all content: {response['url']}")
+                    print(f"   🗑️  Deleted {deleted} blocks, ➕ Added {added} blocks")
+                elif mode == 'replace_content':
+                    deleted = response.get('deleted_content_blocks', 0)
+                    preserved = response.get('preserved_subpages', 0)
+                    added = response.get('added_blocks', 0)
+                    print(f"✅ Successfully replaced content: {response['url']}")
+                    print(f"   🗑️  Deleted {deleted} content blocks, 📄 Preserved {preserved} sub-pages, ➕ Added {added} blocks")
+                else:
+                    print(f"✅ Successfully created: {response['url']}")
             else:
-                print(f"❌ Import failed: {response}")
+                print(f"❌ {mode.title()} failed: {response}")
     
     else:
         parser.print_help()
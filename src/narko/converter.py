@@ -3,151 +3,296 @@ NotionConverter - Convert Marko AST to Notion blocks
 """
 import re
 import os
-import mimetypes
-from typing import List, Dict, Any, Optional
+import functools
+import logging
+from typing import List, Dict, Any, Iterator, Optional
 from urllib.parse import urlparse
 
-from marko import element
+from marko import block, element, inline
+from marko.block import Paragraph
+from marko.inline import RawText
 from .config import Config
+from .extensions import MathBlock, CalloutBlock, TaskListItem, FileUploadBlock, Highlight, InlineMath
 from .notion.uploader import FileUploader, ExternalImporter
+from .utils.cache import UploadCache
+
+logger = logging.getLogger(__name__)
+
+# Notion rejects rich text objects whose content exceeds 2000 characters
+RICH_TEXT_LIMIT = 2000
+
+# Shared annotation and block dicts; blocks only reference these and never mutate them
+_ANN_BOLD = {"bold": True}
+_ANN_ITALIC = {"italic": True}
+_ANN_CODE = {"code": True}
+_ANN_HIGHLIGHT = {"color": "yellow_background"}
+_DIVIDER = {"type": "divider", "divider": {}}
+
+
+def _rich_text(content: str, annotations: Optional[Dict[str, Any]] = None,
+               link: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+    """Build a single Notion text rich text item"""
+    text = {"content": content}
+    if link:
+        text["link"] = link
+    item = {"type": "text", "text": text}
+    if annotations:
+        item["annotations"] = annotations
+    return item
+
+
+# Code block languages accepted by the Notion API
+_NOTION_LANGUAGES = frozenset({
+    'abap', 'arduino', 'bash', 'basic', 'c', 'clojure', 'coffeescript', 'c++',
+    'c#', 'css', 'dart', 'diff', 'docker', 'elixir', 'elm', 'erlang', 'flow',
+    'fortran', 'f#', 'gherkin', 'glsl', 'go', 'graphql', 'groovy', 'haskell',
+    'html', 'java', 'javascript', 'json', 'julia', 'kotlin', 'latex', 'less',
+    'lisp', 'livescript', 'lua', 'makefile', 'markdown', 'markup', 'matlab',
+    'mermaid', 'nix', 'objective-c', 'ocaml', 'pascal', 'perl', 'php',
+    'plain text', 'powershell', 'prolog', 'protobuf', 'python', 'r', 'reason',
+    'ruby', 'rust', 'sass', 'scala', 'scheme', 'scss', 'shell', 'sql', 'swift',
+    'typescript', 'vb.net', 'verilog', 'vhdl', 'visual basic', 'webassembly',
+    'xml', 'yaml', 'java/c/c++/c#'
+})
+
+# Common fence info strings that Notion knows under another name
+_LANGUAGE_ALIASES = {
+    'py': 'python', 'python3': 'python',
+    'js': 'javascript', 'jsx': 'javascript', 'node': 'javascript',
+    'ts': 'typescript', 'tsx': 'typescript',
+    'sh': 'shell', 'zsh': 'shell', 'console': 'shell', 'shell-session': 'shell',
+    'ps1': 'powershell', 'pwsh': 'powershell',
+    'yml': 'yaml', 'md': 'markdown', 'tex': 'latex',
+    'cpp': 'c++', 'cxx': 'c++', 'cs': 'c#', 'csharp': 'c#', 'fsharp': 'f#',
+    'rb': 'ruby', 'rs': 'rust', 'golang': 'go', 'kt': 'kotlin',
+    'hs': 'haskell', 'objc': 'objective-c', 'dockerfile': 'docker',
+    'make': 'makefile', 'proto': 'protobuf', 'wasm': 'webassembly',
+    'text': 'plain text', 'txt': 'plain text', 'plaintext': 'plain text',
+}
+
+# URL schemes os.path.exists can never resolve, so they skip the filesystem check
+_REMOTE_PREFIXES = ('http://', 'https://', 'ftp://', 'data:', 'mailto:', 'file://')
+
+# File types uploaded into a block of their own type; anything else becomes a file block
+_UPLOAD_BLOCK_TYPES = frozenset({'image', 'video', 'audio', 'pdf'})
+
+# Hosts whose links become Notion embeds: the domain itself or any subdomain
+_EMBEDDABLE_HOST_RE = re.compile(
+    r'(?:^|\.)(?:youtube\.com|youtu\.be|vimeo\.com|twitter\.com|x\.com'
+    r'|github\.com|codepen\.io|jsfiddle\.net)$'
+)
+
+
+# Callout type -> Notion callout icon; keys match CalloutBlock's uppercased type.
+# Icon objects are shared by every callout block, like the annotation dicts.
+_CALLOUT_ICONS = {
+    callout_type: {"type": "emoji", "emoji": emoji}
+    for callout_type, emoji in (
+        ('NOTE', '📝'),
+        ('INFO', 'ℹ️'),
+        ('TIP', '💡'),
+        ('WARNING', '⚠️'),
+        ('DANGER', '🚨'),
+        ('SUCCESS', '✅'),
+    )
+}
+_DEFAULT_CALLOUT_ICON = _CALLOUT_ICONS['INFO']
+
+
+@functools.lru_cache(maxsize=256)
+def _map_language(lang: str) -> str:
+    """Map a fence info string to a Notion code block language"""
+    if not lang:
+        return 'plain text'
+    lang = lang.strip().lower()
+    if lang in _NOTION_LANGUAGES:
+        return lang
+    return _LANGUAGE_ALIASES.get(lang, 'plain text')
+
+
+def _rich_text_block(block_type: str, rich_text: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Build a block whose only content is rich text (paragraph, heading, quote, ...)"""
+    return {"type": block_type, block_type: {"rich_text": rich_text}}
+
+
+# Notion has three heading levels; deeper markdown headings become heading_3
+_HEADING_TYPES = ("heading_1", "heading_2", "heading_3", "heading_3", "heading_3", "heading_3")
+
+
+def _resolve_handler(dispatch: Dict[type, Any], cls: type, default):
+    """Find the handler for ``cls`` via its nearest registered base class
+    
+    The result (or ``default``) is stored under ``cls`` so later nodes of the
+    same class hit the dispatch dict directly.
+    """
+    for base in cls.__mro__[1:]:
+        handler = dispatch.get(base)
+        if handler is not None:
+            break
+    else:
+        handler = default
+    dispatch[cls] = handler
+    return handler
+
+
+def _chunk_text(text: str, limit: int = RICH_TEXT_LIMIT) -> List[str]:
+    """Split text into consecutive pieces of at most ``limit`` characters
+
+    Pieces end just after a newline where possible. No characters are
+    dropped, so joining the pieces reproduces the input exactly.
+    """
+    n = len(text)
+    if n <= limit:
+        return [text]
+    
+    chunks = []
+    start = 0
+    while start < n:
+        end = start + limit
+        if end < n:
+            cut = text.rfind('\n', start, end)
+            if cut > start:
+                end = cut + 1
+        chunks.append(text[start:end])
+        start = end
+    
+    return chunks
 
 
 class NotionConverter:
     """Convert Marko AST to Notion blocks with file upload support"""
     
-    def __init__(self, config: Config, file_uploader: FileUploader, external_importer: ExternalImporter):
+    def __init__(self, config: Config, file_uploader: FileUploader, external_importer: ExternalImporter,
+                 upload_files: bool = False):
         self.config = config
         self.file_uploader = file_uploader
         self.external_importer = external_importer
+        # Local files are only uploaded to Notion when asked to; otherwise
+        # they are left as placeholder paragraphs naming the path
+        self.upload_files = upload_files
+        
+        # Local path -> os.path.exists result for the document being converted;
+        # the same asset is often linked many times
+        self._exists_cache: Dict[str, bool] = {}
+        
+        # Whether the last converted document referenced local files. Its blocks
+        # then depend on those files and their uploads, not only on the source.
+        self.references_local_files = False
+        
+        # Local path -> Notion file upload id (None if the upload failed) for
+        # the document being converted, filled by _prefetch_uploads
+        self._uploads: Dict[str, Optional[str]] = {}
+        
+        # Node class -> converter, so each node costs one dict lookup. Classes
+        # not listed (e.g. GFM's Paragraph subclass) are resolved through their
+        # bases on first sight and then cached here too.
+        self._node_dispatch = {
+            block.Paragraph: self._convert_paragraph,
+            block.Heading: self._convert_heading,
+            block.CodeBlock: self._convert_code_block,
+            block.FencedCode: self._convert_code_block,
+            block.List: self._convert_list,
+            block.ListItem: self._convert_list_item,
+            block.Quote: self._convert_quote,
+            block.ThematicBreak: self._convert_thematic_break,
+            block.BlankLine: self._convert_blank_line,
+            block.HTMLBlock: self._convert_html_block,
+            inline.Image: self._convert_image,
+            inline.Link: self._convert_link_as_embed,
+            # Custom extension nodes
+            MathBlock: self._convert_math_block,
+            CalloutBlock: self._convert_callout_block,
+            TaskListItem: self._convert_task_list_item,
+            FileUploadBlock: self._convert_file_upload_block,
+        }
+        
+        # Inline class -> rich text builder, resolved the same way
+        self._text_dispatch = {
+            RawText: self._text_from_raw,
+            inline.Emphasis: self._text_from_emphasis,
+            inline.StrongEmphasis: self._text_from_strong,
+            inline.CodeSpan: self._text_from_code_span,
+            inline.Link: self._text_from_link,
+            inline.Image: self._text_from_image,
+            # Custom inline extensions
+            InlineMath: self._text_from_inline_math,
+            Highlight: self._text_from_highlight,
+        }
     
     def convert(self, ast) -> List[Dict[str, Any]]:
         """Convert Marko AST to Notion blocks"""
-        blocks = []
-        
+        return list(self.iter_blocks(ast))
+    
+    def iter_blocks(self, ast) -> Iterator[Dict[str, Any]]:
+        """Lazily yield Notion blocks for a Marko AST, one top-level node at a time"""
+        self._exists_cache = {}
+        paths = list(dict.fromkeys(self._collect_local_paths(ast)))
+        self.references_local_files = bool(paths)
+        self._uploads = self._prefetch_uploads(paths) if self.upload_files else {}
+        convert_node = self._convert_node
         for child in ast.children:
-            block_data = self._convert_node(child)
+            block_data = convert_node(child)
             if block_data:
-                if isinstance(block_data, list):
-                    blocks.extend(block_data)
+                if block_data.__class__ is list:
+                    yield from block_data
                 else:
-                    blocks.append(block_data)
-        
-        return blocks
+                    yield block_data
     
     def _convert_node(self, node) -> Optional[Dict[str, Any]]:
         """Convert a single AST node to Notion block(s)"""
-        node_type = type(node).__name__
-        
-        # Handle different node types
-        if node_type == 'Paragraph':
-            return self._convert_paragraph(node)
-        elif node_type == 'Heading':
-            return self._convert_heading(node)
-        elif node_type == 'CodeBlock':
-            return self._convert_code_block(node)
-        elif node_type == 'FencedCode':
-            return self._convert_fenced_code(node)
-        elif node_type == 'List':
-            return self._convert_list(node)
-        elif node_type == 'ListItem':
-            return self._convert_list_item(node)
-        elif node_type == 'Quote':
-            return self._convert_quote(node)
-        elif node_type == 'ThematicBreak':
-            return {"type": "divider", "divider": {}}
-        elif node_type == 'Image':
-            return self._convert_image(node)
-        elif node_type == 'Link':
-            return self._convert_link_as_embed(node)
-        elif node_type == 'HTMLBlock':
-            return self._convert_html_block(node)
-        
-        # Handle custom extension nodes
-        elif node_type == 'MathBlock':
-            return self._convert_math_block(node)
-        elif node_type == 'CalloutBlock':
-            return self._convert_callout_block(node)
-        elif node_type == 'TaskListItem':
-            return self._convert_task_list_item(node)
-        elif node_type == 'FileUploadBlock':
-            return self._convert_file_upload_block(node)
-        
-        # Fallback for unknown nodes - convert to paragraph
-        else:
-            return self._convert_unknown_node(node)
+        handler = self._node_dispatch.get(type(node))
+        if handler is None:
+            # Fallback for unknown nodes - convert to paragraph
+            handler = _resolve_handler(self._node_dispatch, type(node), self._convert_unknown_node)
+        return handler(node)
     
     def _convert_paragraph(self, node) -> Dict[str, Any]:
         """Convert paragraph to Notion paragraph block"""
-        rich_text = self._extract_rich_text(node.children)
-        
-        return {
-            "type": "paragraph",
-            "paragraph": {
-                "rich_text": rich_text
-            }
-        }
+        return _rich_text_block("paragraph", self._extract_rich_text(node.children))
     
     def _convert_heading(self, node) -> Dict[str, Any]:
         """Convert heading to Notion heading block"""
-        level = min(node.level, 3)  # Notion supports h1, h2, h3
-        heading_type = f"heading_{level}"
-        
-        rich_text = self._extract_rich_text(node.children)
-        
-        return {
-            "type": heading_type,
-            heading_type: {
-                "rich_text": rich_text
-            }
-        }
+        return _rich_text_block(_HEADING_TYPES[node.level - 1], self._extract_rich_text(node.children))
     
     def _convert_code_block(self, node) -> Dict[str, Any]:
-        """Convert code block to Notion code block"""
-        language = getattr(node, 'lang', '') or 'plain text'
-        
-        return {
-            "type": "code",
-            "code": {
-                "rich_text": [{"type": "text", "text": {"content": node.children[0].children}}],
-                "language": language.lower()
-            }
-        }
-    
-    def _convert_fenced_code(self, node) -> Dict[str, Any]:
-        """Convert fenced code block to Notion code block"""
-        language = getattr(node, 'lang', '') or 'plain text'
-        content = getattr(node, 'children', '') or str(node)
+        """Convert an indented or fenced code block to Notion code block"""
+        # Indented blocks have no info string, so their lang is empty
+        children = node.children
+        if len(children) == 1 and children[0].children.__class__ is str:
+            content = children[0].children
+        else:
+            content = self._extract_plain_text(children)
         
         return {
             "type": "code",
             "code": {
-                "rich_text": [{"type": "text", "text": {"content": content}}],
-                "language": language.lower()
+                "rich_text": [{"type": "text", "text": {"content": chunk}}
+                              for chunk in _chunk_text(content)],
+                "language": _map_language(getattr(node, 'lang', ''))
             }
         }
     
     def _convert_list(self, node) -> List[Dict[str, Any]]:
         """Convert list to Notion list items"""
-        blocks = []
         is_ordered = getattr(node, 'ordered', False)
-        
-        for item in node.children:
-            block = self._convert_list_item(item, is_ordered)
-            if block:
-                blocks.append(block)
-        
-        return blocks
+        convert_item = self._convert_list_item
+        return [block for block in (convert_item(item, is_ordered) for item in node.children) if block]
     
     def _convert_list_item(self, node, is_ordered: bool = False) -> Dict[str, Any]:
         """Convert list item to Notion list item block"""
         list_type = "numbered_list_item" if is_ordered else "bulleted_list_item"
         
+        # Most items are a single paragraph with no nested blocks
+        kids = node.children
+        if len(kids) == 1 and isinstance(kids[0], Paragraph):
+            return _rich_text_block(list_type, self._extract_rich_text(kids[0].children))
+        
         # Extract rich text from the first paragraph if exists
         rich_text = []
         children = []
         
         for child in node.children:
-            if type(child).__name__ == 'Paragraph':
+            if isinstance(child, Paragraph):
                 rich_text.extend(self._extract_rich_text(child.children))
             else:
                 # Handle nested items
@@ -155,12 +300,7 @@ class NotionConverter:
                 if child_block:
                     children.append(child_block)
         
-        block = {
-            "type": list_type,
-            list_type: {
-                "rich_text": rich_text
-            }
-        }
+        block = _rich_text_block(list_type, rich_text)
         
         if children:
             block[list_type]["children"] = children
@@ -169,18 +309,15 @@ class NotionConverter:
     
     def _convert_quote(self, node) -> Dict[str, Any]:
         """Convert quote to Notion quote block"""
-        rich_text = []
-        
-        for child in node.children:
-            if type(child).__name__ == 'Paragraph':
-                rich_text.extend(self._extract_rich_text(child.children))
-        
-        return {
-            "type": "quote",
-            "quote": {
-                "rich_text": rich_text
-            }
-        }
+        return _rich_text_block("quote", self._paragraphs_rich_text(node.children))
+    
+    def _convert_thematic_break(self, node) -> Dict[str, Any]:
+        """Convert thematic break to Notion divider block"""
+        return _DIVIDER
+    
+    def _convert_blank_line(self, node) -> None:
+        """Blank lines only separate blocks; they produce no Notion block"""
+        return None
     
     def _convert_image(self, node) -> Dict[str, Any]:
         """Convert image to Notion image block"""
@@ -188,23 +325,23 @@ class NotionConverter:
         title = getattr(node, 'title', '') or ''
         alt = self._extract_plain_text(node.children)
         
+        caption = [{"type": "text", "text": {"content": title or alt}}] if (title or alt) else []
+        
         # Handle local files vs URLs
         if self._is_local_file(url):
-            # Upload local file
-            try:
-                upload_result = self.file_uploader.upload_file(url)
-                if upload_result and 'id' in upload_result:
-                    return {
-                        "type": "image",
-                        "image": {
-                            "type": "file_upload",
-                            "file_upload": {"id": upload_result['id']},
-                            "caption": [{"type": "text", "text": {"content": title or alt}}] if (title or alt) else []
-                        }
-                    }
-            except Exception as e:
-                print(f"Failed to upload image {url}: {e}")
+            if not self.upload_files:
+                return self._create_text_block(f"[Local image not uploaded: {url}]")
+            file_id = self._uploaded_file_id(url)
+            if file_id is None:
                 return self._create_text_block(f"[Image upload failed: {url}]")
+            return {
+                "type": "image",
+                "image": {
+                    "type": "file_upload",
+                    "file_upload": {"id": file_id},
+                    "caption": caption
+                }
+            }
         else:
             # External image
             return {
@@ -212,7 +349,7 @@ class NotionConverter:
                 "image": {
                     "type": "external",
                     "external": {"url": url},
-                    "caption": [{"type": "text", "text": {"content": title or alt}}] if (title or alt) else []
+                    "caption": caption
                 }
             }
     
@@ -233,14 +370,8 @@ class NotionConverter:
     
     def _convert_html_block(self, node) -> Dict[str, Any]:
         """Convert HTML block to Notion paragraph"""
-        content = getattr(node, 'children', str(node))
-        
-        return {
-            "type": "paragraph",
-            "paragraph": {
-                "rich_text": [{"type": "text", "text": {"content": content}}]
-            }
-        }
+        # Marko keeps the raw HTML in .body; .children is always empty
+        return self._create_text_block(getattr(node, 'body', ''))
     
     # Custom extension converters
     
@@ -257,58 +388,38 @@ class NotionConverter:
     
     def _convert_callout_block(self, node) -> Dict[str, Any]:
         """Convert callout block to Notion callout block"""
-        callout_type = getattr(node, 'callout_type', 'info').lower()
         title = getattr(node, 'title', '')
+        icon = _CALLOUT_ICONS.get(getattr(node, 'callout_type', 'INFO'), _DEFAULT_CALLOUT_ICON)
         
-        # Map callout types to Notion callout icons
-        icon_map = {
-            'note': '📝',
-            'info': 'ℹ️',
-            'tip': '💡',
-            'warning': '⚠️',
-            'danger': '🚨',
-            'success': '✅'
-        }
-        
-        icon = icon_map.get(callout_type, 'ℹ️')
-        
-        # Extract content from children
-        rich_text = []
-        if hasattr(node, 'children'):
-            for child in node.children:
-                if type(child).__name__ == 'Paragraph':
-                    rich_text.extend(self._extract_rich_text(child.children))
-        
-        # Prepend title if present
-        if title:
-            rich_text.insert(0, {
-                "type": "text",
-                "text": {"content": f"{title}: "},
-                "annotations": {"bold": True}
-            })
+        # Start with the title if present, then extract content from children
+        rich_text = [_rich_text(f"{title}: ", _ANN_BOLD)] if title else []
+        children = getattr(node, 'children', ())
+        rich_text.extend(self._paragraphs_rich_text(children))
         
-        return {
+        block = {
             "type": "callout",
             "callout": {
                 "rich_text": rich_text,
-                "icon": {"type": "emoji", "emoji": icon}
+                "icon": icon
             }
         }
+        
+        # Code blocks, lists and the like are nested under the callout
+        child_blocks = self._child_blocks(children)
+        if child_blocks:
+            block["callout"]["children"] = child_blocks
+        
+        return block
     
     def _convert_task_list_item(self, node) -> Dict[str, Any]:
         """Convert task list item to Notion to-do block"""
         checked = getattr(node, 'checked', False)
         
-        rich_text = []
-        if hasattr(node, 'children'):
-            for child in node.children:
-                if type(child).__name__ == 'Paragraph':
-                    rich_text.extend(self._extract_rich_text(child.children))
-        
+        # The item text is parsed inline, so the children are inline nodes
         return {
             "type": "to_do",
             "to_do": {
-                "rich_text": rich_text,
+                "rich_text": self._extract_rich_text(getattr(node, 'children', ())),
                 "checked": checked
             }
         }
@@ -319,36 +430,25 @@ class NotionConverter:
         file_type = getattr(node, 'file_type', 'file')
         title = getattr(node, 'title', '')
         
+        caption = [{"type": "text", "text": {"content": title}}] if title else []
+        
         # Handle local files vs URLs
         if self._is_local_file(file_path):
-            try:
-                if file_type in ['image', 'video', 'audio', 'pdf']:
-                    # Upload specific file types
-                    upload_result = self.file_uploader.upload_file(file_path)
-                    if upload_result and 'id' in upload_result:
-                        return {
-                            "type": file_type,
-                            file_type: {
-                                "type": "file_upload",
-                                "file_upload": {"id": upload_result['id']},
-                                "caption": [{"type": "text", "text": {"content": title}}] if title else []
-                            }
-                        }
-                else:
-                    # Generic file upload
-                    upload_result = self.file_uploader.upload_file(file_path)
-                    if upload_result and 'id' in upload_result:
-                        return {
-                            "type": "file",
-                            "file": {
-                                "type": "file_upload",
-                                "file_upload": {"id": upload_result['id']},
-                                "caption": [{"type": "text", "text": {"content": title}}] if title else []
-                            }
-                        }
-            except Exception as e:
-                print(f"Failed to upload file {file_path}: {e}")
+            if not self.upload_files:
+                return self._create_text_block(f"[Local file not uploaded: {file_path}]")
+            file_id = self._uploaded_file_id(file_path)
+            if file_id is None:
                 return self._create_text_block(f"[File upload failed: {file_path}]")
+            # Media types keep their own block; anything else is a generic file
+            upload_type = file_type if file_type in _UPLOAD_BLOCK_TYPES else "file"
+            return {
+                "type": upload_type,
+                upload_type: {
+                    "type": "file_upload",
+                    "file_upload": {"id": file_id},
+                    "caption": caption
+                }
+            }
         else:
             # External file/URL
             return {
@@ -356,141 +456,223 @@ class NotionConverter:
                 file_type: {
                     "type": "external",
                     "external": {"url": file_path},
-                    "caption": [{"type": "text", "text": {"content": title}}] if title else []
+                    "caption": caption
                 }
             }
     
     def _convert_unknown_node(self, node) -> Dict[str, Any]:
         """Convert unknown node to text paragraph"""
         content = str(node)[:500]  # Truncate long content
-        
-        return {
-            "type": "paragraph",
-            "paragraph": {
-                "rich_text": [{"type": "text", "text": {"content": f"[Unknown node: {content}]"}}]
-            }
-        }
+        return self._create_text_block(f"[Unknown node: {content}]")
     
     # Helper methods
     
     def _extract_rich_text(self, children) -> List[Dict[str, Any]]:
         """Extract rich text from AST children"""
         rich_text = []
+        # Local bindings keep attribute lookups out of the per-inline loop
+        append = rich_text.append
+        extend = rich_text.extend
+        extract_text_data = self._extract_text_data
+        limit = RICH_TEXT_LIMIT
         
         for child in children:
-            text_data = self._extract_text_data(child)
-            if text_data:
-                rich_text.append(text_data)
+            # Plain text runs are the most common inline; build them directly
+            if type(child) is RawText:
+                content = child.children
+                if len(content) <= limit:
+                    append({"type": "text", "text": {"content": content}})
+                    continue
+                text_data = _rich_text(content)
+            else:
+                text_data = extract_text_data(child)
+                if not text_data:
+                    continue
+            text = text_data.get("text")
+            # Nearly every inline fits Notion's limit; only split the rest
+            if text is None or len(text["content"]) <= limit:
+                append(text_data)
+            else:
+                link = text.get("link")
+                annotations = text_data.get("annotations")
+                extend(_rich_text(chunk, annotations, link) for chunk in _chunk_text(text["content"]))
         
         return rich_text
     
+    def _paragraphs_rich_text(self, children) -> List[Dict[str, Any]]:
+        """Rich text of the paragraphs among block children, in order"""
+        rich_text = []
+        for child in children:
+            if isinstance(child, Paragraph):
+                if rich_text:
+                    rich_text.append(_rich_text("\n"))
+                rich_text.extend(self._extract_rich_text(child.children))
+        return rich_text
+    
+    def _child_blocks(self, children) -> List[Dict[str, Any]]:
+        """Notion blocks for the non-paragraph nodes among block children"""
+        blocks = []
+        for child in children:
+            if isinstance(child, Paragraph):
+                continue
+            block_data = self._convert_node(child)
+            if block_data:
+                if block_data.__class__ is list:
+                    blocks.extend(block_data)
+                else:
+                    blocks.append(block_data)
+        return blocks
+    
     def _extract_text_data(self, node) -> Optional[Dict[str, Any]]:
         """Extract text data from a single node"""
-        node_type = type(node).__name__
-        
-        if node_type == 'RawText':
-            return {
-                "type": "text",
-                "text": {"content": node.children}
-            }
-        elif node_type == 'Emphasis':
-            content = self._extract_plain_text([node])
-            return {
-                "type": "text",
-                "text": {"content": content},
-                "annotations": {"italic": True}
-            }
-        elif node_type == 'StrongEmphasis':
-            content = self._extract_plain_text([node])
-            return {
-                "type": "text",
-                "text": {"content": content},
-                "annotations": {"bold": True}
-            }
-        elif node_type == 'InlineCode':
-            return {
-                "type": "text",
-                "text": {"content": node.children},
-                "annotations": {"code": True}
-            }
-        elif node_type == 'Link':
-            content = self._extract_plain_text(node.children)
-            return {
-                "type": "text",
-                "text": {
-                    "content": content,
-                    "link": {"url": node.dest}
-                }
-            }
-        elif node_type == 'Image':
-            alt_text = self._extract_plain_text(node.children)
-            return {
-                "type": "text",
-                "text": {"content": f"[Image: {alt_text or node.dest}]"}
-            }
-        
-        # Handle custom inline extensions
-        elif node_type == 'InlineMath':
-            content = getattr(node, 'content', '')
-            return {
-                "type": "equation",
-                "equation": {"expression": content}
-            }
-        elif node_type == 'Highlight':
-            content = self._extract_plain_text(node.children if hasattr(node, 'children') else [node])
-            return {
-                "type": "text",
-                "text": {"content": content},
-                "annotations": {"color": "yellow_background"}
-            }
-        
-        # Fallback
-        else:
-            content = str(node)
-            if content.strip():
-                return {
-                    "type": "text", 
-                    "text": {"content": content}
-                }
-        
+        handler = self._text_dispatch.get(type(node))
+        if handler is None:
+            handler = _resolve_handler(self._text_dispatch, type(node), self._text_fallback)
+        return handler(node)
+    
+    def _text_from_raw(self, node) -> Dict[str, Any]:
+        return _rich_text(node.children)
+    
+    def _text_from_emphasis(self, node) -> Dict[str, Any]:
+        return _rich_text(self._extract_plain_text([node]), _ANN_ITALIC)
+    
+    def _text_from_strong(self, node) -> Dict[str, Any]:
+        return _rich_text(self._extract_plain_text([node]), _ANN_BOLD)
+    
+    def _text_from_code_span(self, node) -> Dict[str, Any]:
+        return _rich_text(node.children, _ANN_CODE)
+    
+    def _text_from_link(self, node) -> Dict[str, Any]:
+        return _rich_text(self._extract_plain_text(node.children), link={"url": node.dest})
+    
+    def _text_from_image(self, node) -> Dict[str, Any]:
+        alt_text = self._extract_plain_text(node.children)
+        return _rich_text(f"[Image: {alt_text or node.dest}]")
+    
+    def _text_from_inline_math(self, node) -> Dict[str, Any]:
+        content = getattr(node, 'content', '')
+        return {
+            "type": "equation",
+            "equation": {"expression": content}
+        }
+    
+    def _text_from_highlight(self, node) -> Dict[str, Any]:
+        children = getattr(node, 'children', None)
+        content = self._extract_plain_text([node] if children is None else children)
+        return _rich_text(content, _ANN_HIGHLIGHT)
+    
+    def _text_fallback(self, node) -> Optional[Dict[str, Any]]:
+        content = str(node)
+        if content.strip():
+            return _rich_text(content)
         return None
     
     def _extract_plain_text(self, children) -> str:
-        """Extract plain text content from AST children"""
-        text = ""
-        
-        for child in children:
-            if hasattr(child, 'children'):
-                if isinstance(child.children, str):
-                    text += child.children
-                else:
-                    text += self._extract_plain_text(child.children)
+        """Extract plain text content from AST children
+        
+        Walks the subtree with an explicit stack and joins leaf strings once.
+        """
+        parts = []
+        stack = list(reversed(children))
+        # Local bindings keep attribute lookups out of the per-node loop
+        append = parts.append
+        pop = stack.pop
+        extend = stack.extend
+        
+        while stack:
+            child = pop()
+            grandchildren = getattr(child, 'children', None)
+            if grandchildren is None:
+                append(str(child))
+            elif grandchildren.__class__ is str:
+                append(grandchildren)
             else:
-                text += str(child)
+                extend(reversed(grandchildren))
         
-        return text
+        return ''.join(parts)
+    
+    def _collect_local_paths(self, ast) -> Iterator[str]:
+        """Yield the non-URL paths of block-level images and files
+        
+        These are local files whether or not they exist yet. Only block-level
+        nodes are visited: inline images inside paragraphs are rendered as text
+        and never uploaded.
+        """
+        stack = list(ast.children)
+        while stack:
+            node = stack.pop()
+            if isinstance(node, FileUploadBlock):
+                path = node.file_path
+            elif isinstance(node, inline.Image):
+                path = node.dest
+            else:
+                children = getattr(node, 'children', None)
+                if isinstance(children, list):
+                    stack.extend(child for child in children if isinstance(child, block.BlockElement))
+                continue
+            if path and not path.startswith(_REMOTE_PREFIXES):
+                yield path
+    
+    def _prefetch_uploads(self, paths: List[str]) -> Dict[str, Optional[str]]:
+        """Upload every local file in the document concurrently, before conversion
+        
+        Each upload is several round trips; sending the whole document's files
+        through ``upload_many`` overlaps them and reuses one set of connections.
+        """
+        paths = [path for path in paths if self._is_local_file(path)]
+        if not paths:
+            return {}
+        
+        # Identical files under different paths (a shared logo, ...) upload once
+        by_content: Dict[str, List[str]] = {}
+        for path in paths:
+            by_content.setdefault(UploadCache.calculate_file_hash(path) or path, []).append(path)
+        groups = list(by_content.values())
+        
+        try:
+            results = self.file_uploader.upload_many_sync([group[0] for group in groups])
+        except Exception as e:
+            logger.warning("Failed to upload files: %s", e)
+            return dict.fromkeys(paths)
+        
+        uploads = {}
+        for group, result in zip(groups, results):
+            file_id = self._upload_file_id(group[0], result)
+            uploads.update(dict.fromkeys(group, file_id))
+        return uploads
+    
+    def _uploaded_file_id(self, path: str) -> Optional[str]:
+        """Upload id for a local file, from the prefetch when it covered this path"""
+        if path in self._uploads:
+            return self._uploads[path]
+        try:
+            result = self.file_uploader.upload_sync(path)
+        except Exception as e:
+            logger.warning("Failed to upload file %s: %s", path, e)
+            return None
+        return self._upload_file_id(path, result)
+    
+    @staticmethod
+    def _upload_file_id(path: str, result: Dict[str, Any]) -> Optional[str]:
+        """File upload id from an upload result, or None if the upload failed"""
+        if 'error' in result:
+            logger.warning("Failed to upload file %s: %s", path, result['error'])
+            return None
+        return result.get('file_id')
     
     def _is_local_file(self, path: str) -> bool:
         """Check if path is a local file"""
-        return not path.startswith(('http://', 'https://')) and os.path.exists(path)
+        if path.startswith(_REMOTE_PREFIXES):
+            return False
+        exists = self._exists_cache.get(path)
+        if exists is None:
+            exists = self._exists_cache[path] = os.path.exists(path)
+        return exists
     
     def _is_embeddable_url(self, url: str) -> bool:
         """Check if URL should be embedded"""
-        embeddable_domains = [
-            'youtube.com', 'youtu.be', 'vimeo.com',
-            'twitter.com', 'x.com',
-            'github.com', 'gist.github.com',
-            'codepen.io', 'jsfiddle.net'
-        ]
-        
-        parsed = urlparse(url)
-        return any(domain in parsed.netloc for domain in embeddable_domains)
+        return _EMBEDDABLE_HOST_RE.search(urlparse(url).hostname or '') is not None
     
     def _create_text_block(self, content: str) -> Dict[str, Any]:
         """Create a simple text block"""
-        return {
-            "type": "paragraph",
-            "paragraph": {
-                "rich_text": [{"type": "text", "text": {"content": content}}]
-            }
-        }
\ No newline at end of file
+        return _rich_text_block("paragraph", [{"type": "text", "text": {"content": content}}])
\ No newline at end of file
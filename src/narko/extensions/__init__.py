@@ -4,7 +4,7 @@ Marko extensions for Notion-specific markdown features
 
 from .blocks import MathBlock, CalloutBlock, TaskListItem, FileUploadBlock
 from .inline import Highlight, InlineMath
-from .extension import NotionExtension
+from .extension import NotionExtension, get_markdown
 
 __all__ = [
     "MathBlock",
@@ -13,5 +13,6 @@ __all__ = [
     "FileUploadBlock",
     "Highlight",
     "InlineMath",
-    "NotionExtension"
+    "NotionExtension",
+    "get_markdown"
 ]
\ No newline at end of file
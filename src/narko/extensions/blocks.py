@@ -3,14 +3,58 @@ Block-level Marko extensions for Notion features
 """
 import os
 import re
+import functools
+import mimetypes
 from marko import block
 from typing import Optional
 
 
+# Block type for ![file](...) links, inferred from the file extension
+_FILE_TYPES_BY_EXTENSION = {
+    **dict.fromkeys(('.jpg', '.jpeg', '.png', '.gif', '.bmp', '.webp', '.svg'), 'image'),
+    **dict.fromkeys(('.mp4', '.mov', '.avi', '.mkv', '.webm', '.m4v'), 'video'),
+    **dict.fromkeys(('.mp3', '.wav', '.m4a', '.aac', '.ogg', '.flac'), 'audio'),
+    '.pdf': 'pdf',
+}
+_MEDIA_TYPES = frozenset({'image', 'video', 'audio'})
+
+
+@functools.lru_cache(maxsize=256)
+def _file_type_for_extension(ext: str) -> str:
+    """Block type for a lowercase extension, asking mimetypes about ones not in the table"""
+    file_type = _FILE_TYPES_BY_EXTENSION.get(ext)
+    if file_type is None:
+        mime_type = mimetypes.guess_type(f'file{ext}')[0] or ''
+        major = mime_type.partition('/')[0]
+        if major in _MEDIA_TYPES:
+            file_type = major
+        elif mime_type == 'application/pdf':
+            file_type = 'pdf'
+        else:
+            file_type = 'file'
+    return file_type
+
+
+def _raw_line(source) -> str:
+    """The unprefixed line at the parse position, read once per position
+    
+    Every block element is tried against every line, so each element below
+    first checks for a literal token it needs in this shared line and only
+    runs its full pattern (plus marko's prefix matching) when it is present.
+    """
+    cached = getattr(source.context, 'narko_line', None)
+    if cached is not None and cached[0] == source.pos:
+        return cached[1]
+    line = source.next_line(require_prefix=False) or ''
+    source.context.narko_line = (source.pos, line)
+    return line
+
+
 class MathBlock(block.BlockElement):
     """Block-level math equation using $$...$$"""
     
     pattern = re.compile(r'^( {0,3})\$\$[ \t]*$', re.M)
+    token = '$$'  # Literal every match contains
     override = False
     priority = 8  # Higher priority
     
@@ -21,14 +65,26 @@ class MathBlock(block.BlockElement):
     
     @classmethod
     def match(cls, source):
-        return source.expect_re(cls.pattern)
+        return cls.token in _raw_line(source) and source.expect_re(cls.pattern)
+    
+    # Everything up to and including the closing $$ line
+    body_pattern = re.compile(r'(.*?)^[ \t]*\$\$[ \t]*$\n?', re.M | re.S)
     
     @classmethod
     def parse(cls, source):
         m = source.match
         source.consume()
-        content_lines = []
+        instance = cls(m)
         
+        # Outside any container the body is taken in one match; nested blocks
+        # need their container prefix checked per line, so they keep the loop
+        if not source.prefix and source.expect_re(cls.body_pattern):
+            body = source.match.group(1)
+            source.consume()
+            instance.content = '\n'.join(line.rstrip() for line in body.split('\n')).strip()
+            return instance
+        
+        content_lines = []
         while not source.exhausted:
             line = source.next_line()
             if line.strip() == '$$':
@@ -37,49 +93,41 @@ class MathBlock(block.BlockElement):
             content_lines.append(line.rstrip())
             source.consume()
         
-        instance = cls(m)
         instance.content = '\n'.join(content_lines).strip()
         return instance
 
 
 class CalloutBlock(block.BlockElement):
-    """Callout block starting with > [!TYPE]"""
+    """Callout block starting with > [!TYPE]
+    
+    Like a quote, the following "> " lines are parsed as nested blocks and
+    become the callout's children.
+    """
     
-    pattern = re.compile(r'^( {0,3})> \[!(\w+)\](.*)$', re.M)
+    pattern = re.compile(r'^( {0,3})> \[!(\w+)\](.*)$\n?', re.M)
+    token = '> [!'  # Literal every match contains
     override = True  # Override regular quotes
     priority = 8  # Higher than regular quotes
+    _prefix = block.Quote._prefix  # Body lines continue with "> "
     
     def __init__(self, match):
         self.tight = True
         self.callout_type = match.group(2).upper()
         self.title = match.group(3).strip()
         self.children = []
-        self.content_lines = []
     
     @classmethod
     def match(cls, source):
-        return source.expect_re(cls.pattern)
+        return cls.token in _raw_line(source) and source.expect_re(cls.pattern)
     
     @classmethod  
     def parse(cls, source):
-        m = source.match
-        instance = cls(m)
+        instance = cls(source.match)
         source.consume()
         
-        # Collect content lines that start with >
-        while not source.exhausted:
-            line = source.next_line()
-            if line.startswith('> '):
-                instance.content_lines.append(line[2:])  # Remove "> "
-                source.consume()
-            elif line.strip() == '>':
-                instance.content_lines.append('')  # Empty line in quote
-                source.consume()
-            else:
-                break
-        
-        # Join content
-        instance.content = '\n'.join(instance.content_lines) if instance.content_lines else ""
+        # Let marko parse the quoted body, as it does for block quotes
+        with source.under_state(instance):
+            instance.children = source.parser.parse_source(source)
         
         return instance
 
@@ -88,6 +136,7 @@ class TaskListItem(block.BlockElement):
     """Task list item with checkbox"""
     
     pattern = re.compile(r'^( {0,3})- \[([ xX])\] (.*)$', re.M)
+    token = '- ['  # Literal every match contains
     override = False
     priority = 8  # Higher priority than regular list items
     
@@ -96,10 +145,11 @@ class TaskListItem(block.BlockElement):
         self.checked = match.group(2).lower() == 'x'
         self.content = match.group(3)
         self.children = []
+        self.inline_body = self.content  # marko parses this into inline children
     
     @classmethod
     def match(cls, source):
-        return source.expect_re(cls.pattern)
+        return cls.token in _raw_line(source) and source.expect_re(cls.pattern)
     
     @classmethod
     def parse(cls, source):
@@ -113,6 +163,7 @@ class FileUploadBlock(block.BlockElement):
     
     # Enhanced pattern to match ![file](path) or ![type:title](path)
     pattern = re.compile(r'^( {0,3})!\[(file|image|video|pdf|audio|embed)(?::([^\]]*))?\]\(([^)]+)\)[ \t]*$', re.M)
+    token = '!['  # Literal every match contains
     override = False
     priority = 9  # Higher than regular images
     
@@ -132,27 +183,11 @@ class FileUploadBlock(block.BlockElement):
     
     def _infer_file_type(self) -> str:
         """Infer file type from extension"""
-        ext = os.path.splitext(self.file_path)[1].lower()
-        
-        # Image extensions
-        if ext in ['.jpg', '.jpeg', '.png', '.gif', '.bmp', '.webp', '.svg']:
-            return 'image'
-        # Video extensions  
-        elif ext in ['.mp4', '.mov', '.avi', '.mkv', '.webm', '.m4v']:
-            return 'video'
-        # Audio extensions
-        elif ext in ['.mp3', '.wav', '.m4a', '.aac', '.ogg', '.flac']:
-            return 'audio'
-        # PDF
-        elif ext == '.pdf':
-            return 'pdf'
-        # Default to file
-        else:
-            return 'file'
+        return _file_type_for_extension(os.path.splitext(self.file_path)[1].lower())
     
     @classmethod
     def match(cls, source):
-        return source.expect_re(cls.pattern)
+        return cls.token in _raw_line(source) and source.expect_re(cls.pattern)
     
     @classmethod
     def parse(cls, source):
@@ -1,6 +1,10 @@
 """
 Main Notion extension for Marko
 """
+import threading
+
+from marko import Markdown
+from marko.ext import gfm
 from marko.helpers import MarkoExtension
 from .blocks import MathBlock, CalloutBlock, TaskListItem, FileUploadBlock
 from .inline import Highlight, InlineMath
@@ -16,4 +20,19 @@ NotionExtension = MarkoExtension(
         Highlight, 
         InlineMath
     ]
-)
\ No newline at end of file
+)
+
+
+_local = threading.local()
+
+
+def get_markdown() -> Markdown:
+    """Return this thread's shared parser with the Notion and GFM extensions
+    
+    Building a Markdown instance sets up the whole extension pipeline, so it is
+    done once per thread and reused for every file parsed on that thread.
+    """
+    markdown = getattr(_local, 'markdown', None)
+    if markdown is None:
+        markdown = _local.markdown = Markdown(extensions=[NotionExtension, gfm.GFM])
+    return markdown
@@ -2,166 +2,81 @@
 Notion block building utilities
 
 Provides utilities for building Notion API blocks from parsed content.
+The builders are stateless functions; NotionBlockBuilder groups them for
+callers that prefer a builder object.
 """
 
 from typing import Dict, List, Any, Optional
 
 
+def _text(content: str) -> List[Dict[str, Any]]:
+    """Rich text array holding a single plain text item"""
+    return [{"type": "text", "text": {"content": content}}]
+
+
+def text_block(content: str, block_type: str = "paragraph") -> Dict[str, Any]:
+    """Create a text block"""
+    return {"type": block_type, block_type: {"rich_text": _text(content)}}
+
+
+def heading_block(content: str, level: int = 1) -> Dict[str, Any]:
+    """Create a heading block"""
+    heading_type = f"heading_{min(level, 3)}"
+    return {"type": heading_type, heading_type: {"rich_text": _text(content)}}
+
+
+def code_block(content: str, language: str = "plain text") -> Dict[str, Any]:
+    """Create a code block"""
+    return {"type": "code", "code": {"rich_text": _text(content), "language": language}}
+
+
+def bulleted_list_item(content: str) -> Dict[str, Any]:
+    """Create a bulleted list item"""
+    return text_block(content, "bulleted_list_item")
+
+
+def numbered_list_item(content: str) -> Dict[str, Any]:
+    """Create a numbered list item"""
+    return text_block(content, "numbered_list_item")
+
+
+def quote_block(content: str) -> Dict[str, Any]:
+    """Create a quote block"""
+    return text_block(content, "quote")
+
+
+def divider_block() -> Dict[str, Any]:
+    """Create a divider block"""
+    return {"type": "divider", "divider": {}}
+
+
+def _external_block(block_type: str, url: str, caption: str) -> Dict[str, Any]:
+    """Create a block pointing at an external file, with an optional caption"""
+    body = {"type": "external", "external": {"url": url}}
+    if caption:
+        body["caption"] = _text(caption)
+    return {"type": block_type, block_type: body}
+
+
+def image_block(url: str, caption: str = "") -> Dict[str, Any]:
+    """Create an image block"""
+    return _external_block("image", url, caption)
+
+
+def file_block(url: str, caption: str = "") -> Dict[str, Any]:
+    """Create a file block"""
+    return _external_block("file", url, caption)
+
+
 class NotionBlockBuilder:
     """Utility class for building Notion API blocks"""
-    
-    def __init__(self):
-        pass
-    
-    def text_block(self, content: str, block_type: str = "paragraph") -> Dict[str, Any]:
-        """Create a text block"""
-        return {
-            "type": block_type,
-            block_type: {
-                "rich_text": [
-                    {
-                        "type": "text",
-                        "text": {
-                            "content": content
-                        }
-                    }
-                ]
-            }
-        }
-    
-    def heading_block(self, content: str, level: int = 1) -> Dict[str, Any]:
-        """Create a heading block"""
-        heading_type = f"heading_{min(level, 3)}"
-        return {
-            "type": heading_type,
-            heading_type: {
-                "rich_text": [
-                    {
-                        "type": "text",
-                        "text": {
-                            "content": content
-                        }
-                    }
-                ]
-            }
-        }
-    
-    def code_block(self, content: str, language: str = "plain text") -> Dict[str, Any]:
-        """Create a code block"""
-        return {
-            "type": "code",
-            "code": {
-                "rich_text": [
-                    {
-                        "type": "text",
-                        "text": {
-                            "content": content
-                        }
-                    }
-                ],
-                "language": language
-            }
-        }
-    
-    def bulleted_list_item(self, content: str) -> Dict[str, Any]:
-        """Create a bulleted list item"""
-        return {
-            "type": "bulleted_list_item",
-            "bulleted_list_item": {
-                "rich_text": [
-                    {
-                        "type": "text",
-                        "text": {
-                            "content": content
-                        }
-                    }
-                ]
-            }
-        }
-    
-    def numbered_list_item(self, content: str) -> Dict[str, Any]:
-        """Create a numbered list item"""
-        return {
-            "type": "numbered_list_item", 
-            "numbered_list_item": {
-                "rich_text": [
-                    {
-                        "type": "text",
-                        "text": {
-                            "content": content
-                        }
-                    }
-                ]
-            }
-        }
-    
-    def quote_block(self, content: str) -> Dict[str, Any]:
-        """Create a quote block"""
-        return {
-            "type": "quote",
-            "quote": {
-                "rich_text": [
-                    {
-                        "type": "text",
-                        "text": {
-                            "content": content
-                        }
-                    }
-                ]
-            }
-        }
-    
-    def divider_block(self) -> Dict[str, Any]:
-        """Create a divider block"""
-        return {
-            "type": "divider",
-            "divider": {}
-        }
-    
-    def image_block(self, url: str, caption: str = "") -> Dict[str, Any]:
-        """Create an image block"""
-        block = {
-            "type": "image",
-            "image": {
-                "type": "external",
-                "external": {
-                    "url": url
-                }
-            }
-        }
-        
-        if caption:
-            block["image"]["caption"] = [
-                {
-                    "type": "text",
-                    "text": {
-                        "content": caption
-                    }
-                }
-            ]
-        
-        return block
-    
-    def file_block(self, url: str, caption: str = "") -> Dict[str, Any]:
-        """Create a file block"""
-        block = {
-            "type": "file",
-            "file": {
-                "type": "external", 
-                "external": {
-                    "url": url
-                }
-            }
-        }
-        
-        if caption:
-            block["file"]["caption"] = [
-                {
-                    "type": "text",
-                    "text": {
-                        "content": caption
-                    }
-                }
-            ]
-        
-        return block
\ No newline at end of file
+
+    text_block = staticmethod(text_block)
+    heading_block = staticmethod(heading_block)
+    code_block = staticmethod(code_block)
+    bulleted_list_item = staticmethod(bulleted_list_item)
+    numbered_list_item = staticmethod(numbered_list_item)
+    quote_block = staticmethod(quote_block)
+    divider_block = staticmethod(divider_block)
+    image_block = staticmethod(image_block)
+    file_block = staticmethod(file_block)
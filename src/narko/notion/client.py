@@ -1,18 +1,76 @@
 """
 Notion API client for page and block operations
 """
+import os
+import re
+import json
+import time
 import requests
 import logging
-from typing import List, Dict, Any, Optional
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Iterable, Iterator, Optional
 from ..config import Config
 
+# Encode request bodies and decode responses with orjson when it is installed
+# (pip install narko[fast])
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 logger = logging.getLogger(__name__)
 
+# Maximum number of children Notion accepts per create/append request
+BLOCK_BATCH_SIZE = 100
+
+# Connections kept open to api.notion.com; covers the concurrent imports and
+# deletes that share one client
+POOL_SIZE = 16
+
+# Concurrent DELETE requests when clearing a page; well inside POOL_SIZE and
+# Notion's rate limit (rate limiting is retried by _request anyway)
+DELETE_WORKERS = 8
+
+# The converter always emits string content; set NARKO_VALIDATE to re-check
+# every rich text item before sending (e.g. when debugging hand-built blocks)
+_VALIDATE_RICH_TEXT = bool(os.environ.get('NARKO_VALIDATE'))
+
+# A page ID as Notion prints it in URLs (32 hex digits) or as a dashed UUID
+_RE_PAGE_ID = re.compile(
+    r'([0-9a-f]{32})|[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}',
+    re.IGNORECASE
+)
+
+
+def _dump_payload(data: Any) -> bytes:
+    """Encode a request body as compact UTF-8 JSON"""
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def _load_response(response: requests.Response) -> Any:
+    """Decode a JSON response body, with orjson when it is installed"""
+    if orjson is not None:
+        return orjson.loads(response.content)
+    return response.json()
+
+
+def _retry_delay(response: requests.Response, fallback: float) -> float:
+    """Seconds to wait before retrying a rate-limited response"""
+    try:
+        return max(float(response.headers.get('Retry-After')), 0.0)
+    except (TypeError, ValueError):
+        return fallback
+
 
 class NotionClient:
     """Clean Notion API client focused on core operations"""
     
-    def __init__(self, config: Config):
+    def __init__(self, config: Config, session: Optional[requests.Session] = None):
         self.config = config
         self.api_key = config.notion_api_key
         self.base_url = "https://api.notion.com/v1"
@@ -21,149 +79,225 @@ class NotionClient:
             "Content-Type": "application/json",
             "Notion-Version": config.notion_version
         }
+        # Pooled session so consecutive requests reuse one keep-alive connection
+        self.session = session or self._new_session()
+        self.session.headers.update(self.headers)
+    
+    @staticmethod
+    def _new_session() -> requests.Session:
+        """Session with a connection pool sized for concurrent use
+        
+        Transient gateway errors are retried for idempotent methods only (urllib3's
+        default), so a POST that may have created a page is never resent. Rate
+        limits (429) are handled by _request, which honours Retry-After.
+        """
+        retry = Retry(total=3, backoff_factor=0.5, status_forcelist=(502, 503, 504),
+                      raise_on_status=False)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_SIZE, max_retries=retry)
+        session = requests.Session()
+        session.mount('https://', adapter)
+        return session
+    
+    def close(self) -> None:
+        """Close the pooled connections"""
+        self.session.close()
+    
+    def __enter__(self) -> 'NotionClient':
+        return self
+    
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+    
+    def _request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """Send a request on the session, waiting out rate limits (HTTP 429)
+        
+        Notion asks clients to honour Retry-After; without it the delay backs off
+        exponentially from config.base_retry_delay, up to config.max_retries retries.
+        """
+        send = getattr(self.session, method)
+        if 'json' in kwargs:
+            # Encode once up front; retries resend the same bytes
+            kwargs['data'] = _dump_payload(kwargs.pop('json'))
+        attempt = 0
+        while True:
+            response = send(url, **kwargs)
+            if response.status_code != 429 or attempt >= self.config.max_retries:
+                return response
+            
+            delay = _retry_delay(response, self.config.base_retry_delay * 2 ** attempt)
+            logger.warning(f"Rate limited by Notion, retrying in {delay:.1f}s")
+            time.sleep(delay)
+            attempt += 1
     
     def extract_page_id(self, url_or_id: str) -> str:
         """Extract page ID from Notion URL or return ID if already formatted"""
         if not url_or_id:
             return url_or_id
         
-        import re
-        # If it's already a UUID, return as-is
-        uuid_pattern = r'^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$'
-        if re.match(uuid_pattern, url_or_id, re.IGNORECASE):
+        match = _RE_PAGE_ID.search(url_or_id)
+        if not match:
             return url_or_id
         
-        # Extract from URL - look for the UUID pattern in the URL
-        uuid_match = re.search(r'([0-9a-f]{8}[0-9a-f]{4}[0-9a-f]{4}[0-9a-f]{4}[0-9a-f]{12})', url_or_id, re.IGNORECASE)
-        if uuid_match:
-            uuid_str = uuid_match.group(1)
-            # Add dashes to make it a proper UUID
-            return f"{uuid_str[0:8]}-{uuid_str[8:12]}-{uuid_str[12:16]}-{uuid_str[16:20]}-{uuid_str[20:32]}"
+        uuid_str = match.group(1)
+        if uuid_str is None:
+            # Already a dashed UUID (on its own or inside a URL)
+            return match.group()
         
-        return url_or_id
+        # Add dashes to make it a proper UUID
+        return f"{uuid_str[0:8]}-{uuid_str[8:12]}-{uuid_str[12:16]}-{uuid_str[16:20]}-{uuid_str[20:32]}"
     
     def get_page(self, page_id: str) -> Dict[str, Any]:
         """Get page information"""
         page_id = self.extract_page_id(page_id)
-        response = requests.get(f"{self.base_url}/pages/{page_id}", headers=self.headers)
+        response = self._request('get', f"{self.base_url}/pages/{page_id}")
         
         if response.status_code == 200:
-            return response.json()
+            return _load_response(response)
         else:
             raise Exception(f"Failed to get page: {response.status_code} - {response.text}")
     
-    def create_page(self, parent_id: str, title: str, blocks: List[Dict], properties: Optional[Dict] = None) -> Dict[str, Any]:
-        """Create a page in Notion with blocks"""
+    def create_page(self, parent_id: str, title: str, blocks: Iterable[Dict], properties: Optional[Dict] = None) -> Dict[str, Any]:
+        """Create a page in Notion with blocks
+        
+        Blocks may be any iterable (e.g. NotionConverter.iter_blocks); only one
+        request's worth is held in memory at a time.
+        """
         parent_id = self.extract_page_id(parent_id)
+        blocks = iter(blocks)
         
-        # Validate all blocks before sending
-        validated_blocks = self._validate_blocks(blocks[:100])  # Notion limit
+        # Validate blocks before sending
+        first_batch = self._validate_blocks(list(islice(blocks, BLOCK_BATCH_SIZE)))
         
         data = {
             "parent": {"page_id": parent_id},
             "properties": properties or {
                 "title": {"title": [{"text": {"content": title}}]}
             },
-            "children": validated_blocks
+            "children": first_batch
         }
         
-        response = requests.post(f"{self.base_url}/pages", headers=self.headers, json=data)
+        response = self._request('post', f"{self.base_url}/pages", json=data)
         
         if response.status_code == 200:
-            return response.json()
+            page = _load_response(response)
+            # Notion caps children per request; append the remainder in batches
+            self._append_batches(page["id"], blocks)
+            return page
         else:
-            error_data = response.json() if response.headers.get('content-type', '').startswith('application/json') else response.text
+            error_data = _load_response(response) if response.headers.get('content-type', '').startswith('application/json') else response.text
             raise Exception(f"Failed to create page: {response.status_code} - {error_data}")
     
     def _validate_blocks(self, blocks: List[Dict]) -> List[Dict]:
-        """Validate and clean blocks before sending to Notion"""
-        validated = []
-        
-        for block in blocks:
-            block_type = block.get('type')
-            if not block_type:
-                logger.warning("Block missing type, skipping")
-                continue
-            
-            # Validate rich text content
-            if block_type in block and 'rich_text' in block[block_type]:
-                rich_text = block[block_type]['rich_text']
-                for rt_item in rich_text:
-                    if 'text' in rt_item and 'content' in rt_item['text']:
-                        content = rt_item['text']['content']
+        """Validate and clean blocks before sending to Notion
+        
+        Blocks without a type are dropped. Rich text is only re-checked when
+        NARKO_VALIDATE is set, so converter output normally takes one
+        filtering pass.
+        """
+        validated = [block for block in blocks if block.get('type')]
+        if len(validated) != len(blocks):
+            logger.warning(f"{len(blocks) - len(validated)} block(s) missing type, skipping")
+        
+        # Validate rich text content
+        if _VALIDATE_RICH_TEXT:
+            for block in validated:
+                payload = block.get(block['type'])
+                rich_text = payload.get('rich_text') if payload else None
+                for rt_item in rich_text or ():
+                    text = rt_item.get('text')
+                    if text and 'content' in text:
+                        content = text['content']
                         if not isinstance(content, str):
-                            rt_item['text']['content'] = str(content) if content else ""
-            
-            validated.append(block)
+                            text['content'] = str(content) if content else ""
         
         return validated
     
     def append_blocks(self, block_id: str, blocks: List[Dict]) -> Dict[str, Any]:
         """Append blocks to an existing page or block"""
         block_id = self.extract_page_id(block_id)
-        validated_blocks = self._validate_blocks(blocks[:100])
+        return self._append_batches(block_id, blocks)
+    
+    def _append_batches(self, block_id: str, blocks: Iterable[Dict]) -> Dict[str, Any]:
+        """Validate and append blocks in batches of BLOCK_BATCH_SIZE, returning combined results"""
+        result: Dict[str, Any] = {"results": []}
+        blocks = iter(blocks)
         
-        data = {"children": validated_blocks}
-        response = requests.patch(f"{self.base_url}/blocks/{block_id}/children", headers=self.headers, json=data)
+        while True:
+            raw = list(islice(blocks, BLOCK_BATCH_SIZE))
+            if not raw:
+                break
+            batch = self._validate_blocks(raw)
+            if not batch:
+                continue  # Every block in this batch was dropped; later ones may be valid
+            data = {"children": batch}
+            response = self._request('patch', f"{self.base_url}/blocks/{block_id}/children", json=data)
+            
+            if response.status_code != 200:
+                error_data = _load_response(response) if response.headers.get('content-type', '').startswith('application/json') else response.text
+                raise Exception(f"Failed to append blocks: {response.status_code} - {error_data}")
+            
+            batch = _load_response(response)
+            results = result["results"] + batch.get("results", [])
+            result = batch
+            result["results"] = results
         
-        if response.status_code == 200:
-            return response.json()
-        else:
-            error_data = response.json() if response.headers.get('content-type', '').startswith('application/json') else response.text
-            raise Exception(f"Failed to append blocks: {response.status_code} - {error_data}")
+        return result
     
     def get_page_blocks(self, page_id: str) -> List[Dict[str, Any]]:
-        """Get all blocks from a page recursively"""
+        """Get all top-level blocks of a page"""
+        return list(self.iter_page_blocks(page_id))
+    
+    def iter_page_blocks(self, page_id: str) -> Iterator[Dict[str, Any]]:
+        """Yield a page's top-level blocks, fetching one page of results at a time"""
         page_id = self.extract_page_id(page_id)
-        all_blocks = []
+        url = f"{self.base_url}/blocks/{page_id}/children"
+        start_cursor = None
         
-        def fetch_blocks(block_id: str, start_cursor: Optional[str] = None) -> List[Dict]:
+        while True:
             params = {"page_size": 100}
             if start_cursor:
                 params["start_cursor"] = start_cursor
             
-            response = requests.get(
-                f"{self.base_url}/blocks/{block_id}/children", 
-                headers=self.headers, 
-                params=params
-            )
+            response = self._request('get', url, params=params)
             
             if response.status_code != 200:
-                error_data = response.json() if response.headers.get('content-type', '').startswith('application/json') else response.text
+                error_data = _load_response(response) if response.headers.get('content-type', '').startswith('application/json') else response.text
                 raise Exception(f"Failed to get blocks: {response.status_code} - {error_data}")
             
-            data = response.json()
-            blocks = data.get('results', [])
-            
-            # Recursively fetch more pages if available
-            if data.get('has_more'):
-                blocks.extend(fetch_blocks(block_id, data.get('next_cursor')))
+            data = _load_response(response)
+            yield from data.get('results', [])
             
-            return blocks
-        
-        all_blocks = fetch_blocks(page_id)
-        return all_blocks
+            if not data.get('has_more'):
+                return
+            start_cursor = data.get('next_cursor')
     
     def delete_blocks(self, block_ids: List[str]) -> Dict[str, Any]:
-        """Delete multiple blocks"""
+        """Delete multiple blocks, up to DELETE_WORKERS requests at a time"""
         results = {"deleted": [], "errors": []}
+        if not block_ids:
+            return results
         
-        for block_id in block_ids:
-            try:
-                response = requests.delete(
-                    f"{self.base_url}/blocks/{block_id}", 
-                    headers=self.headers
-                )
-                if response.status_code == 200:
+        with ThreadPoolExecutor(max_workers=min(DELETE_WORKERS, len(block_ids))) as pool:
+            # map keeps the input order, so results read the same as a serial loop
+            for block_id, error in zip(block_ids, pool.map(self._delete_block, block_ids)):
+                if error is None:
                     results["deleted"].append(block_id)
                 else:
-                    error_data = response.json() if response.headers.get('content-type', '').startswith('application/json') else response.text
-                    results["errors"].append({"block_id": block_id, "error": f"Status {response.status_code}: {error_data}"})
-            except Exception as e:
-                results["errors"].append({"block_id": block_id, "error": str(e)})
+                    results["errors"].append({"block_id": block_id, "error": error})
         
         return results
     
+    def _delete_block(self, block_id: str) -> Optional[str]:
+        """Delete one block, returning an error message or None on success"""
+        try:
+            response = self._request('delete', f"{self.base_url}/blocks/{block_id}")
+        except Exception as e:
+            return str(e)
+        if response.status_code == 200:
+            return None
+        error_data = _load_response(response) if response.headers.get('content-type', '').startswith('application/json') else response.text
+        return f"Status {response.status_code}: {error_data}"
+    
     def replace_all_blocks(self, page_id: str, new_blocks: List[Dict]) -> Dict[str, Any]:
         """Replace ALL blocks on a page with new blocks"""
         page_id = self.extract_page_id(page_id)
@@ -181,25 +315,12 @@ class NotionClient:
                     logger.warning(f"Some blocks couldn't be deleted: {delete_result['errors']}")
             
             # Step 3: Add new blocks
-            validated_blocks = self._validate_blocks(new_blocks[:100])
-            data = {"children": validated_blocks}
-            
-            response = requests.patch(
-                f"{self.base_url}/blocks/{page_id}/children", 
-                headers=self.headers, 
-                json=data
-            )
+            result = self._append_batches(page_id, new_blocks)
+            result["mode"] = "replace_all"
+            result["deleted_blocks"] = len(existing_blocks)
+            result["added_blocks"] = len(result["results"])
+            return result
             
-            if response.status_code == 200:
-                result = response.json()
-                result["mode"] = "replace_all"
-                result["deleted_blocks"] = len(existing_blocks)
-                result["added_blocks"] = len(validated_blocks)
-                return result
-            else:
-                error_data = response.json() if response.headers.get('content-type', '').startswith('application/json') else response.text
-                raise Exception(f"Failed to add new blocks: {response.status_code} - {error_data}")
-                
         except Exception as e:
             return {"error": f"Replace all blocks failed: {str(e)}"}
     
@@ -211,44 +332,24 @@ class NotionClient:
             # Step 1: Get all existing blocks
             existing_blocks = self.get_page_blocks(page_id)
             
-            # Step 2: Identify content blocks vs sub-pages
-            content_blocks = []
-            subpage_blocks = []
-            
-            for block in existing_blocks:
-                if block.get('type') == 'child_page':
-                    subpage_blocks.append(block)
-                else:
-                    content_blocks.append(block)
+            # Step 2: Only content blocks are deleted; sub-pages stay
+            content_block_ids = [block['id'] for block in existing_blocks if block.get('type') != 'child_page']
+            preserved_subpages = len(existing_blocks) - len(content_block_ids)
             
             # Step 3: Delete only content blocks
-            if content_blocks:
-                content_block_ids = [block['id'] for block in content_blocks]
+            if content_block_ids:
                 delete_result = self.delete_blocks(content_block_ids)
                 
                 if delete_result["errors"]:
                     logger.warning(f"Some content blocks couldn't be deleted: {delete_result['errors']}")
             
             # Step 4: Add new blocks (they will appear before sub-pages)
-            validated_blocks = self._validate_blocks(new_blocks[:100])
-            data = {"children": validated_blocks}
+            result = self._append_batches(page_id, new_blocks)
+            result["mode"] = "replace_content"
+            result["deleted_content_blocks"] = len(content_block_ids)
+            result["preserved_subpages"] = preserved_subpages
+            result["added_blocks"] = len(result["results"])
+            return result
             
-            response = requests.patch(
-                f"{self.base_url}/blocks/{page_id}/children", 
-                headers=self.headers, 
-                json=data
-            )
-            
-            if response.status_code == 200:
-                result = response.json()
-                result["mode"] = "replace_content"
-                result["deleted_content_blocks"] = len(content_blocks)
-                result["preserved_subpages"] = len(subpage_blocks)
-                result["added_blocks"] = len(validated_blocks)
-                return result
-            else:
-                error_data = response.json() if response.headers.get('content-type', '').startswith('application/json') else response.text
-                raise Exception(f"Failed to add new blocks: {response.status_code} - {error_data}")
-                
         except Exception as e:
             return {"error": f"Replace content blocks failed: {str(e)}"}
\ No newline at end of file
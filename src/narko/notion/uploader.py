@@ -3,6 +3,7 @@ File upload and external import functionality for Notion
 """
 import os
 import time
+import functools
 import asyncio
 import aiohttp
 import aiofiles
@@ -10,13 +11,25 @@ import requests
 import datetime
 import mimetypes
 import logging
-from typing import Dict, Optional, Callable
+from typing import Any, Dict, List, Optional, Callable
 from ..config import Config
 from ..utils.cache import UploadCache
 from ..utils.validation import FileValidator
 
 logger = logging.getLogger(__name__)
 
+# External import polling: wait this long in total, backing off exponentially
+# from the first delay up to the largest
+POLL_TIMEOUT = 30.0
+POLL_FIRST_DELAY = 0.25
+POLL_MAX_DELAY = 5.0
+
+
+@functools.lru_cache(maxsize=256)
+def _guess_mime_type(ext: str) -> Optional[str]:
+    """System MIME type for a lowercase extension, or None if unknown"""
+    return mimetypes.guess_type(f'file{ext}')[0]
+
 
 class FileUploader:
     """Handle direct file uploads to Notion"""
@@ -25,13 +38,21 @@ class FileUploader:
         self.config = config
         self.cache = UploadCache(config)
         self.validator = FileValidator(config)
+        self.headers = {
+            "Authorization": f"Bearer {config.notion_api_key}",
+            "Notion-Version": config.notion_version
+        }
     
     async def upload_async(self, file_path: str, file_name: str = None,
-                          progress_callback: Optional[Callable] = None) -> Dict:
+                          progress_callback: Optional[Callable] = None,
+                          session: Optional[aiohttp.ClientSession] = None) -> Dict:
         """Upload file asynchronously with streaming support
 
         Automatically applies .txt extension workaround for unsupported text file types
         like .py, .sh, .md that Notion's API doesn't accept natively.
+
+        Pass ``session`` to reuse its connections; otherwise a session is
+        opened for this upload alone.
         """
         if not file_name:
             file_name = os.path.basename(file_path)
@@ -62,68 +83,69 @@ class FileUploader:
                 logger.info(f"Cache hit for {file_name}")
                 return cached_result
         
+        own_session = session is None
+        if own_session:
+            session = aiohttp.ClientSession()
+        
         try:
-            async with aiohttp.ClientSession() as session:
-                headers = {
-                    "Authorization": f"Bearer {self.config.notion_api_key}",
-                    "Notion-Version": self.config.notion_version
-                }
+            # Step 1: Create file upload request
+            create_data = {"name": file_name, "size": file_size}
+            
+            async with session.post(
+                "https://api.notion.com/v1/file_uploads",
+                headers=self.headers,
+                json=create_data,
+                timeout=aiohttp.ClientTimeout(total=30)
+            ) as create_response:
                 
-                # Step 1: Create file upload request
-                create_data = {"name": file_name, "size": file_size}
+                if create_response.status != 200:
+                    error_text = await create_response.text()
+                    return {'error': f'Failed to create upload (status {create_response.status}): {error_text[:200]}'}
                 
-                async with session.post(
-                    "https://api.notion.com/v1/file_uploads",
-                    headers=headers,
-                    json=create_data,
-                    timeout=aiohttp.ClientTimeout(total=30)
-                ) as create_response:
-                    
-                    if create_response.status != 200:
-                        error_text = await create_response.text()
-                        return {'error': f'Failed to create upload (status {create_response.status}): {error_text[:200]}'}
-                    
-                    upload_data = await create_response.json()
-                    upload_url = upload_data.get("upload_url")
-                    file_id = upload_data.get("id")
-                    
-                    if not upload_url or not file_id:
-                        return {'error': 'Invalid upload response from Notion API'}
+                upload_data = await create_response.json()
+                upload_url = upload_data.get("upload_url")
+                file_id = upload_data.get("id")
                 
-                # Step 2: Upload file content
-                # Check if we got a direct upload URL or need to use the /send endpoint
-                if not upload_url:
-                    # Use the /send endpoint
-                    upload_url = f"https://api.notion.com/v1/file_uploads/{file_id}/send"
+                if not upload_url or not file_id:
+                    return {'error': 'Invalid upload response from Notion API'}
+            
+            # Step 2: Upload file content
+            # Check if we got a direct upload URL or need to use the /send endpoint
+            if not upload_url:
+                # Use the /send endpoint
+                upload_url = f"https://api.notion.com/v1/file_uploads/{file_id}/send"
 
-                upload_result = await self._upload_file_content(
-                    session, upload_url, file_path, file_name, file_size, progress_callback
-                )
-                
-                if 'error' in upload_result:
-                    return upload_result
-                
-                # Success - create result
-                result = {
-                    "file_id": file_id,
-                    "name": file_name,
-                    "original_name": original_name if needs_workaround else file_name,
-                    "size": file_size,
-                    "success": True,
-                    "upload_timestamp": datetime.datetime.utcnow().isoformat(),
-                    "upload_method": "direct",
-                    "workaround_applied": needs_workaround
-                }
-                
-                # Cache result
-                if file_hash and self.cache.is_enabled:
-                    self.cache.set(file_hash, result)
-                
-                return result
-                
+            upload_result = await self._upload_file_content(
+                session, upload_url, file_path, file_name, file_size, progress_callback
+            )
+            
+            if 'error' in upload_result:
+                return upload_result
+            
+            # Success - create result
+            result = {
+                "file_id": file_id,
+                "name": file_name,
+                "original_name": original_name if needs_workaround else file_name,
+                "size": file_size,
+                "success": True,
+                "upload_timestamp": datetime.datetime.utcnow().isoformat(),
+                "upload_method": "direct",
+                "workaround_applied": needs_workaround
+            }
+            
+            # Cache result
+            if file_hash and self.cache.is_enabled:
+                self.cache.set(file_hash, result)
+            
+            return result
+            
         except Exception as e:
             logger.error(f"Upload failed for {file_path}: {e}")
             return {'error': f'Upload failed: {str(e)}', 'file_path': file_path}
+        finally:
+            if own_session:
+                await session.close()
     
     async def _upload_file_content(self, session: aiohttp.ClientSession, upload_url: str, 
                                   file_path: str, file_name: str, file_size: int,
@@ -133,19 +155,13 @@ class FileUploader:
             # Detect proper MIME type
             mime_type = self._get_mime_type(file_name)
             
-            # Upload URL needs authorization headers
-            upload_headers = {
-                "Authorization": f"Bearer {self.config.notion_api_key}",
-                "Notion-Version": self.config.notion_version
-            }
-            
             if file_size > self.config.stream_chunk_size:
                 # Streaming upload for large files
-                return await self._stream_upload(session, upload_url, upload_headers, 
+                return await self._stream_upload(session, upload_url, self.headers, 
                                                file_path, file_name, mime_type, file_size, progress_callback)
             else:
                 # Simple upload for small files
-                return await self._simple_upload(session, upload_url, upload_headers, 
+                return await self._simple_upload(session, upload_url, self.headers, 
                                                 file_path, file_name, mime_type)
                 
         except Exception as e:
@@ -153,35 +169,34 @@ class FileUploader:
     
     async def _simple_upload(self, session: aiohttp.ClientSession, upload_url: str,
                            headers: Dict, file_path: str, file_name: str, mime_type: str) -> Dict:
-        """Simple file upload for smaller files"""
-        try:
-            # Check if this is a /send endpoint (new API) or S3 presigned URL
-            if '/send' in upload_url:
-                # New API endpoint - use multipart/form-data
-                async with aiofiles.open(file_path, 'rb') as f:
-                    file_data = await f.read()
+        """Simple file upload for smaller files
 
-                data = aiohttp.FormData()
-                data.add_field('file', file_data, filename=file_name, content_type=mime_type)
-
-                # Don't send Content-Type header for multipart
-                upload_headers = {k: v for k, v in headers.items() if k != 'Content-Type'}
-            else:
-                # S3 presigned URL - use raw file data
-                async with aiofiles.open(file_path, 'rb') as f:
-                    file_data = await f.read()
+        The open file is handed to aiohttp, which reads it in chunks off the
+        event loop while sending, so the body is never held in memory whole.
+        """
+        try:
+            with open(file_path, 'rb') as f:
+                # Check if this is a /send endpoint (new API) or S3 presigned URL
+                if '/send' in upload_url:
+                    # New API endpoint - use multipart/form-data
+                    data = aiohttp.FormData()
+                    data.add_field('file', f, filename=file_name, content_type=mime_type)
 
-                data = file_data
-                upload_headers = headers.copy()
-                upload_headers['Content-Type'] = mime_type
+                    # Don't send Content-Type header for multipart
+                    upload_headers = {k: v for k, v in headers.items() if k != 'Content-Type'}
+                else:
+                    # S3 presigned URL - use raw file data
+                    data = f
+                    upload_headers = headers.copy()
+                    upload_headers['Content-Type'] = mime_type
 
-            async with session.post(upload_url, headers=upload_headers, data=data,
-                                  timeout=aiohttp.ClientTimeout(total=120)) as response:
-                if response.status not in [200, 201, 204]:  # 204 for successful S3 uploads
-                    error_text = await response.text()
-                    return {'error': f'Upload failed (status {response.status}): {error_text[:200]}'}
+                async with session.post(upload_url, headers=upload_headers, data=data,
+                                      timeout=aiohttp.ClientTimeout(total=120)) as response:
+                    if response.status not in [200, 201, 204]:  # 204 for successful S3 uploads
+                        error_text = await response.text()
+                        return {'error': f'Upload failed (status {response.status}): {error_text[:200]}'}
 
-                return {'success': True}
+                    return {'success': True}
 
         except Exception as e:
             return {'error': f'Simple upload failed: {str(e)}'}
@@ -189,38 +204,49 @@ class FileUploader:
     async def _stream_upload(self, session: aiohttp.ClientSession, upload_url: str, 
                            headers: Dict, file_path: str, file_name: str, mime_type: str,
                            file_size: int, progress_callback: Optional[Callable] = None) -> Dict:
-        """Streaming upload for larger files with progress reporting"""
+        """Streaming upload for larger files with progress reporting
+
+        Without a progress callback the open file goes straight to aiohttp,
+        which reads and sends it in chunks itself; with one, each chunk passes
+        through a generator that reports progress first.
+        """
         try:
+            if not progress_callback:
+                with open(file_path, 'rb') as f:
+                    return await self._post_stream(session, upload_url, headers, f, file_name, mime_type)
+            
             uploaded_bytes = 0
             
             async with aiofiles.open(file_path, 'rb') as f:
-                data = aiohttp.FormData()
-                
                 async def file_sender():
                     nonlocal uploaded_bytes
                     while chunk := await f.read(self.config.stream_chunk_size):
                         uploaded_bytes += len(chunk)
-                        if progress_callback:
-                            progress = uploaded_bytes / file_size
-                            progress_callback(file_name, progress)
+                        progress_callback(file_name, uploaded_bytes / file_size)
                         yield chunk
                 
-                data.add_field('file', file_sender(), filename=file_name, content_type=mime_type)
-                
-                async with session.post(upload_url, headers=headers, data=data, 
-                                      timeout=aiohttp.ClientTimeout(total=300)) as response:
-                    if response.status not in [200, 201]:
-                        error_text = await response.text()
-                        return {'error': f'Streaming upload failed (status {response.status}): {error_text[:200]}'}
-                    
-                    if progress_callback:
-                        progress_callback(file_name, 1.0)  # Complete
-                    
-                    return {'success': True}
+                result = await self._post_stream(session, upload_url, headers, file_sender(), file_name, mime_type)
+            
+            if 'error' not in result:
+                progress_callback(file_name, 1.0)  # Complete
+            return result
                     
         except Exception as e:
             return {'error': f'Streaming upload failed: {str(e)}'}
     
+    async def _post_stream(self, session: aiohttp.ClientSession, upload_url: str, headers: Dict,
+                           body: Any, file_name: str, mime_type: str) -> Dict:
+        """Post a file body (file object or async chunk iterator) as multipart form data"""
+        data = aiohttp.FormData()
+        data.add_field('file', body, filename=file_name, content_type=mime_type)
+        
+        async with session.post(upload_url, headers=headers, data=data, 
+                              timeout=aiohttp.ClientTimeout(total=300)) as response:
+            if response.status not in [200, 201]:
+                error_text = await response.text()
+                return {'error': f'Streaming upload failed (status {response.status}): {error_text[:200]}'}
+            return {'success': True}
+    
     def _get_mime_type(self, file_name: str) -> str:
         """Get Notion-compatible MIME type
 
@@ -236,40 +262,65 @@ class FileUploader:
 
         # Fallback to system detection if not in our mapping
         if mime_type == 'application/octet-stream':
-            detected_type, _ = mimetypes.guess_type(file_name)
+            detected_type = _guess_mime_type(ext)
             if detected_type:
                 mime_type = detected_type
 
         return mime_type
     
+    async def upload_many(self, file_paths: List[str]) -> List[Dict]:
+        """Upload several files over one session, in the order given
+
+        At most ``max_concurrent_uploads`` uploads run at once; they share the
+        session's keep-alive connections instead of each opening its own.
+        """
+        semaphore = asyncio.Semaphore(self.config.max_concurrent_uploads)
+        
+        async with aiohttp.ClientSession() as session:
+            async def upload(file_path: str) -> Dict:
+                async with semaphore:
+                    return await self.upload_async(file_path, session=session)
+            
+            return list(await asyncio.gather(*map(upload, file_paths)))
+    
     def upload_sync(self, file_path: str, file_name: str = None) -> Dict:
         """Synchronous wrapper for upload"""
+        return self._run(self.upload_async(file_path, file_name))
+    
+    def upload_many_sync(self, file_paths: List[str]) -> List[Dict]:
+        """Synchronous wrapper for upload_many"""
+        return self._run(self.upload_many(file_paths))
+    
+    @staticmethod
+    def _run(coro):
+        """Run a coroutine to completion on this thread's event loop"""
         try:
             loop = asyncio.get_event_loop()
         except RuntimeError:
             loop = asyncio.new_event_loop()
             asyncio.set_event_loop(loop)
         
-        return loop.run_until_complete(self.upload_async(file_path, file_name))
+        return loop.run_until_complete(coro)
 
 
 class ExternalImporter:
     """Handle external file imports using Notion's indirect import method"""
     
-    def __init__(self, config: Config):
+    def __init__(self, config: Config, session: Optional[requests.Session] = None):
         self.config = config
+        # Pass NotionClient.session to share its pooled connections to api.notion.com
+        self.session = session or requests.Session()
+        self.headers = {
+            "Authorization": f"Bearer {config.notion_api_key}",
+            "Content-Type": "application/json",
+            "Notion-Version": config.notion_version
+        }
     
     def import_file(self, external_url: str, filename: str = None) -> Dict:
         """Import external file using Notion's indirect import method"""
         if not filename:
             filename = self._extract_filename_from_url(external_url)
         
-        headers = {
-            "Authorization": f"Bearer {self.config.notion_api_key}",
-            "Content-Type": "application/json", 
-            "Notion-Version": self.config.notion_version
-        }
-        
         logger.info(f"Starting external import: {external_url} -> {filename}")
         
         try:
@@ -280,9 +331,9 @@ class ExternalImporter:
                 "external_url": external_url
             }
             
-            response = requests.post(
+            response = self.session.post(
                 "https://api.notion.com/v1/file_uploads",
-                headers=headers,
+                headers=self.headers,
                 json=upload_request,
                 timeout=30
             )
@@ -299,7 +350,7 @@ class ExternalImporter:
                 return {"error": "No file ID returned from external import request"}
             
             # Step 2: Poll for completion
-            return self._poll_for_completion(file_id, filename, external_url, headers)
+            return self._poll_for_completion(file_id, filename, external_url)
             
         except Exception as e:
             logger.error(f"External import error for {external_url}: {e}")
@@ -327,18 +378,20 @@ class ExternalImporter:
         else:
             return extracted_name
     
-    def _poll_for_completion(self, file_id: str, filename: str, external_url: str, headers: Dict) -> Dict:
-        """Poll for external import completion"""
+    def _poll_for_completion(self, file_id: str, filename: str, external_url: str) -> Dict:
+        """Poll for external import completion
+
+        Imports usually finish within a couple of seconds, so polling starts
+        fast and backs off exponentially until POLL_TIMEOUT has passed.
+        """
         logger.info(f"Polling for external import completion: {file_id}")
-        max_attempts = 30  # 30 seconds max wait
-        attempt = 0
+        deadline = time.monotonic() + POLL_TIMEOUT
+        delay = POLL_FIRST_DELAY
         
-        while attempt < max_attempts:
-            attempt += 1
-            
-            status_response = requests.get(
+        while True:
+            status_response = self.session.get(
                 f"https://api.notion.com/v1/file_uploads/{file_id}",
-                headers=headers,
+                headers=self.headers,
                 timeout=10
             )
             
@@ -366,7 +419,11 @@ class ExternalImporter:
                     return {"error": "External import expired"}
             
             # Still pending, wait and retry
-            time.sleep(1)
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            time.sleep(min(delay, remaining))
+            delay = min(delay * 2, POLL_MAX_DELAY)
         
         logger.error(f"External import timeout for {filename}")
-        return {"error": "External import timeout - file did not complete within 30 seconds"}
\ No newline at end of file
+        return {"error": f"External import timeout - file did not complete within {POLL_TIMEOUT:g} seconds"}
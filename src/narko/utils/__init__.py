@@ -2,13 +2,14 @@
 Utility modules for narko functionality
 """
 
-from .cache import UploadCache
+from .cache import UploadCache, BlockCache
 from .validation import FileValidator
 from .text import TextProcessor
 from .embedding import EmbeddingGenerator
 
 __all__ = [
     "UploadCache",
+    "BlockCache",
     "FileValidator", 
     "TextProcessor",
     "EmbeddingGenerator"
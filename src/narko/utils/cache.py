@@ -10,6 +10,7 @@ import datetime
 import logging
 from typing import Dict, Optional
 from ..config import Config
+from .. import __version__
 
 logger = logging.getLogger(__name__)
 
@@ -23,6 +24,9 @@ class UploadCache:
         self.ttl_seconds = config.cache_ttl_hours * 3600
         self.is_enabled = True
         self._lock = threading.Lock()
+        # Parsed cache file and the (mtime, size) it was read at
+        self._cache = None
+        self._cache_stamp = None
     
     def get(self, file_hash: str) -> Optional[Dict]:
         """Get cached upload result by file hash"""
@@ -49,7 +53,8 @@ class UploadCache:
                 self._remove_entry(file_hash) 
                 return None
         
-        return entry
+        # Copy so callers can annotate the result without touching the cache
+        return dict(entry)
     
     def set(self, file_hash: str, upload_result: Dict):
         """Cache upload result by file hash"""
@@ -73,15 +78,25 @@ class UploadCache:
             self._save_cache(cache)
     
     def _load_cache(self) -> Dict:
-        """Load cache with TTL validation"""
-        if not os.path.exists(self.cache_file):
+        """Load cache, re-reading the file only when it changed on disk"""
+        try:
+            stat = os.stat(self.cache_file)
+        except (OSError, ValueError):
+            self._cache = None
             return {}
         
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        if self._cache is not None and stamp == self._cache_stamp:
+            return self._cache
+        
         try:
             with open(self.cache_file, 'r') as f:
-                return json.load(f)
+                self._cache = json.load(f)
+            self._cache_stamp = stamp
+            return self._cache
         except Exception as e:
             logger.error(f"Error loading cache: {e}")
+            self._cache = None
             return {}
     
     def _save_cache(self, cache: Dict):
@@ -95,8 +110,13 @@ class UploadCache:
             # Atomic rename
             os.rename(temp_file, self.cache_file)
             
+            stat = os.stat(self.cache_file)
+            self._cache = cache
+            self._cache_stamp = (stat.st_mtime_ns, stat.st_size)
+            
         except Exception as e:
             logger.error(f"Error saving cache: {e}")
+            self._cache = None
     
     def _remove_entry(self, file_hash: str):
         """Remove expired entry from cache"""
@@ -157,11 +177,72 @@ class UploadCache:
     @staticmethod
     def calculate_file_hash(file_path: str) -> str:
         """Calculate SHA-256 hash of file for deduplication"""
-        hasher = hashlib.sha256()
         try:
             with open(file_path, 'rb') as f:
-                for chunk in iter(lambda: f.read(4096), b""):
+                if hasattr(hashlib, 'file_digest'):  # Python 3.11+, hashes in C
+                    return hashlib.file_digest(f, 'sha256').hexdigest()
+                hasher = hashlib.sha256()
+                for chunk in iter(lambda: f.read(1024 * 1024), b""):
                     hasher.update(chunk)
-            return hasher.hexdigest()
+                return hasher.hexdigest()
         except Exception:
-            return ""
\ No newline at end of file
+            return ""
+
+# Bump whenever converter output or what gets cached changes so stale cached
+# blocks are ignored
+_CACHE_VERSION = 6
+
+
+class BlockCache:
+    """On-disk cache of converted Notion blocks keyed by markdown source hash"""
+    
+    def __init__(self, config: Config):
+        self.config = config
+        self.cache_dir = config.blocks_cache_dir
+        self.ttl_seconds = config.cache_ttl_hours * 3600
+        self.is_enabled = bool(self.cache_dir)
+    
+    @staticmethod
+    def source_hash(raw: bytes) -> str:
+        """Hash markdown source together with the cache and package versions"""
+        hasher = hashlib.sha256(f"v{_CACHE_VERSION}:{__version__}:".encode())
+        hasher.update(raw)
+        return hasher.hexdigest()
+    
+    def _path(self, source_hash: str) -> str:
+        return os.path.join(self.cache_dir, f"{source_hash}.json")
+    
+    def get(self, source_hash: str) -> Optional[list]:
+        """Get cached blocks, ignoring entries older than the cache TTL
+        
+        Blocks may reference uploaded file IDs, so they expire with uploads.
+        """
+        if not self.is_enabled:
+            return None
+        
+        try:
+            path = self._path(source_hash)
+            if time.time() - os.path.getmtime(path) > self.ttl_seconds:
+                return None
+            with open(path, 'r') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.error(f"Error loading block cache: {e}")
+            return None
+    
+    def set(self, source_hash: str, blocks: list):
+        """Cache converted blocks with atomic write"""
+        if not self.is_enabled:
+            return
+        
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            path = self._path(source_hash)
+            temp_file = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(temp_file, 'w') as f:
+                json.dump(blocks, f)
+            os.replace(temp_file, path)
+        except Exception as e:
+            logger.error(f"Error saving block cache: {e}")
@@ -1,6 +1,7 @@
 """
 Embedding generation utilities for narko
 """
+import os
 import json
 import logging
 import hashlib
@@ -121,11 +122,12 @@ class EmbeddingGenerator:
     def generate_file_embedding(self, file_path: str, text_content: str = None) -> Dict[str, Any]:
         """Generate embedding for a file"""
         try:
-            # Get file extension
-            file_ext = file_path.lower().split('.')[-1] if '.' in file_path else ''
+            # Get file extension, lowercasing only the suffix rather than the whole path
+            suffix = os.path.splitext(file_path)[1].lower()
+            file_ext = suffix[1:]
             
             # Check if embedding is supported for this file type
-            if not self.config.is_embedding_enabled(f'.{file_ext}'):
+            if not self.config.is_embedding_enabled(suffix):
                 return {
                     'success': False,
                     'error': f'Embedding not supported for file type: {file_ext}',
@@ -0,0 +1,90 @@
+"""
+Lazy glob matching built on os.scandir
+"""
+import os
+import re
+import fnmatch
+import functools
+from typing import Iterator, List
+
+_RE_MAGIC = re.compile(r'[*?[]')
+
+# Match names case-insensitively where the filesystem does (e.g. Windows)
+_CASE_FLAGS = re.IGNORECASE if os.path.normcase('A') == 'a' else 0
+
+# Path separators a pattern may use; Windows accepts '/' as well as a backslash
+_SEPARATORS = (os.sep, os.altsep) if os.altsep else (os.sep,)
+_RE_SEPARATOR = re.compile('[' + re.escape(''.join(_SEPARATORS)) + ']')
+
+
+@functools.lru_cache(maxsize=64)
+def _compile_component(component: str):
+    """Compile one wildcard path component to a regex matcher, once"""
+    return re.compile(fnmatch.translate(component), _CASE_FLAGS).match
+
+
+def has_magic(pattern: str) -> bool:
+    """Whether a pattern contains glob wildcards"""
+    return _RE_MAGIC.search(pattern) is not None
+
+
+def iter_glob(pattern: str) -> Iterator[str]:
+    """Yield paths matching a glob pattern, following glob.glob's rules
+
+    Leading components without wildcards are joined and checked once rather
+    than listed, and only wildcard components are scanned with os.scandir,
+    whose DirEntry type checks avoid extra stat calls. Names starting with '.'
+    only match components that start with '.' as well, and '**' is not
+    recursive (as with glob.glob(pattern) without recursive=True).
+    """
+    if not pattern:
+        return
+
+    drive, rest = os.path.splitdrive(pattern)
+    base = drive
+    if rest.startswith(_SEPARATORS):
+        base += os.sep
+    dirs_only = rest.endswith(_SEPARATORS)
+    parts = [part for part in _RE_SEPARATOR.split(rest) if part]
+
+    for path in _iter_matches(base, parts):
+        if not dirs_only:
+            yield path
+        elif os.path.isdir(path):
+            yield os.path.join(path, '')
+
+
+def _iter_matches(base: str, parts: List[str]) -> Iterator[str]:
+    """Expand the remaining pattern components below base"""
+    # Fixed components need no directory listing
+    fixed = 0
+    while fixed < len(parts) and not has_magic(parts[fixed]):
+        fixed += 1
+    if fixed:
+        base = os.path.join(base, *parts[:fixed])
+        parts = parts[fixed:]
+
+    if not parts:
+        if base and os.path.lexists(base):
+            yield base
+        return
+
+    head, rest = parts[0], parts[1:]
+    match = _compile_component(head)
+    include_hidden = head.startswith('.')
+
+    try:
+        with os.scandir(base or os.curdir) as entries:
+            names = sorted(
+                (entry.name, entry) for entry in entries
+                if (include_hidden or not entry.name.startswith('.')) and match(entry.name)
+            )
+    except OSError:
+        return
+
+    for name, entry in names:
+        path = os.path.join(base, name)
+        if not rest:
+            yield path
+        elif entry.is_dir():
+            yield from _iter_matches(path, rest)
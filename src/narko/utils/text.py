@@ -8,6 +8,36 @@ from ..config import Config
 
 logger = logging.getLogger(__name__)
 
+# Patterns compiled once at import and shared by every TextProcessor
+_MARKDOWN_PATTERNS = {
+    'headers': re.compile(r'^#{1,6}\s+(.+)$', re.MULTILINE),
+    'links': re.compile(r'\[([^\]]+)\]\([^)]+\)'),
+    'images': re.compile(r'!\[([^\]]*)\]\([^)]+\)'),
+    'code_blocks': re.compile(r'```[\s\S]*?```'),
+    'inline_code': re.compile(r'`([^`]+)`'),
+    'bold': re.compile(r'\*\*([^*]+)\*\*'),
+    'italic': re.compile(r'\*([^*]+)\*'),
+    'strikethrough': re.compile(r'~~([^~]+)~~'),
+}
+
+_CODE_PATTERNS = {
+    'python': re.compile(r'def\s+(\w+)\s*\([^)]*\):'),
+    'javascript': re.compile(r'function\s+(\w+)\s*\([^)]*\)\s*{'),
+    'java': re.compile(r'(public|private|protected)?\s*\w+\s+(\w+)\s*\([^)]*\)\s*{'),
+    'comments': re.compile(r'(//.*$|/\*[\s\S]*?\*/|#.*$)', re.MULTILINE),
+}
+
+_RE_WHITESPACE = re.compile(r'\s+')
+_RE_HEADER_MARKER = re.compile(r'^#{1,6}\s+', re.MULTILINE)
+_RE_LINE_COMMENT = re.compile(r'//.*$', re.MULTILINE)
+_RE_BLOCK_COMMENT = re.compile(r'/\*[\s\S]*?\*/')
+_RE_HASH_COMMENT = re.compile(r'#.*$', re.MULTILINE)
+_RE_BLANK_LINES = re.compile(r'\n\s*\n\s*\n+')
+_RE_SENTENCE_END = re.compile(r'[.!?]+')
+_RE_NON_WORD = re.compile(r'[^\w]')
+_RE_KEYWORD = re.compile(r'\b[a-zA-Z]{3,}\b')
+_RE_XML_TAG = re.compile(r'<(\w+)')
+
 
 class TextProcessor:
     """Advanced text processing for content extraction and analysis"""
@@ -16,25 +46,8 @@ class TextProcessor:
         self.config = config
         self.max_content_length = 50000  # Reasonable limit for text processing
         
-        # Common patterns for text cleaning
-        self.markdown_patterns = {
-            'headers': re.compile(r'^#{1,6}\s+(.+)$', re.MULTILINE),
-            'links': re.compile(r'\[([^\]]+)\]\([^)]+\)'),
-            'images': re.compile(r'!\[([^\]]*)\]\([^)]+\)'),
-            'code_blocks': re.compile(r'```[\s\S]*?```'),
-            'inline_code': re.compile(r'`([^`]+)`'),
-            'bold': re.compile(r'\*\*([^*]+)\*\*'),
-            'italic': re.compile(r'\*([^*]+)\*'),
-            'strikethrough': re.compile(r'~~([^~]+)~~'),
-        }
-        
-        # File type specific patterns
-        self.code_patterns = {
-            'python': re.compile(r'def\s+(\w+)\s*\([^)]*\):'),
-            'javascript': re.compile(r'function\s+(\w+)\s*\([^)]*\)\s*{'),
-            'java': re.compile(r'(public|private|protected)?\s*\w+\s+(\w+)\s*\([^)]*\)\s*{'),
-            'comments': re.compile(r'(//.*$|/\*[\s\S]*?\*/|#.*$)', re.MULTILINE),
-        }
+        self.markdown_patterns = _MARKDOWN_PATTERNS
+        self.code_patterns = _CODE_PATTERNS
     
     def extract_text_content(self, file_path: str) -> Dict[str, any]:
         """Extract and process text content from file"""
@@ -211,8 +224,7 @@ class TextProcessor:
                 }
             elif file_ext == 'xml':
                 # Basic XML analysis
-                import re
-                tags = re.findall(r'<(\w+)', content)
+                tags = _RE_XML_TAG.findall(content)
                 unique_tags = list(set(tags))
                 analysis['structure_info'] = {
                     'unique_tags': unique_tags[:10],  # First 10 unique tags
@@ -227,7 +239,7 @@ class TextProcessor:
     def _analyze_plain_text(self, content: str) -> Dict[str, any]:
         """Analyze plain text content"""
         words = content.split()
-        sentences = re.split(r'[.!?]+', content)
+        sentences = _RE_SENTENCE_END.split(content)
         
         return {
             'type': 'plain_text',
@@ -251,7 +263,7 @@ class TextProcessor:
         # Count words (case-insensitive, excluding stop words)
         word_count = {}
         for word in words:
-            clean_word = re.sub(r'[^\w]', '', word.lower())
+            clean_word = _RE_NON_WORD.sub('', word.lower())
             if clean_word and clean_word not in stop_words and len(clean_word) > 2:
                 word_count[clean_word] = word_count.get(clean_word, 0) + 1
         
@@ -264,25 +276,35 @@ class TextProcessor:
             return ""
         
         # Remove excessive whitespace
-        content = re.sub(r'\s+', ' ', content).strip()
+        content = _RE_WHITESPACE.sub(' ', content).strip()
         
-        # File-type specific cleaning
+        # File-type specific cleaning; each pass is skipped unless its marker
+        # is present, so plain prose never enters the regex engine
         if file_ext in ['md', 'markdown']:
             # Clean markdown syntax but keep content
-            content = re.sub(r'^#{1,6}\s+', '', content, flags=re.MULTILINE)  # Remove header markers
-            content = re.sub(r'\*\*([^*]+)\*\*', r'\1', content)  # Remove bold markers
-            content = re.sub(r'\*([^*]+)\*', r'\1', content)  # Remove italic markers
-            content = re.sub(r'`([^`]+)`', r'\1', content)  # Remove inline code markers
-            content = re.sub(r'\[([^\]]+)\]\([^)]+\)', r'\1', content)  # Keep link text only
+            if '#' in content:
+                content = _RE_HEADER_MARKER.sub('', content)  # Remove header markers
+            if '*' in content:
+                if '**' in content:
+                    content = _MARKDOWN_PATTERNS['bold'].sub(r'\1', content)  # Remove bold markers
+                content = _MARKDOWN_PATTERNS['italic'].sub(r'\1', content)  # Remove italic markers
+            if '`' in content:
+                content = _MARKDOWN_PATTERNS['inline_code'].sub(r'\1', content)  # Remove inline code markers
+            if '](' in content:
+                content = _MARKDOWN_PATTERNS['links'].sub(r'\1', content)  # Keep link text only
         
         elif file_ext in ['py', 'js', 'java', 'cpp', 'c', 'ts']:
             # For code, remove comments and excessive whitespace
-            content = re.sub(r'//.*$', '', content, flags=re.MULTILINE)  # Remove // comments
-            content = re.sub(r'/\*[\s\S]*?\*/', '', content)  # Remove /* */ comments
-            content = re.sub(r'#.*$', '', content, flags=re.MULTILINE)  # Remove # comments
+            if '//' in content:
+                content = _RE_LINE_COMMENT.sub('', content)  # Remove // comments
+            if '/*' in content:
+                content = _RE_BLOCK_COMMENT.sub('', content)  # Remove /* */ comments
+            if '#' in content:
+                content = _RE_HASH_COMMENT.sub('', content)  # Remove # comments
         
         # General cleanup
-        content = re.sub(r'\n\s*\n\s*\n+', '\n\n', content)  # Reduce multiple newlines
+        if '\n' in content:
+            content = _RE_BLANK_LINES.sub('\n\n', content)  # Reduce multiple newlines
         content = content[:self.max_content_length]  # Truncate if needed
         
         return content.strip()
@@ -293,7 +315,7 @@ class TextProcessor:
             return []
         
         # Simple keyword extraction based on word frequency and length
-        words = re.findall(r'\b[a-zA-Z]{3,}\b', content.lower())
+        words = _RE_KEYWORD.findall(content.lower())
         
         # Common stop words to exclude
         stop_words = {
@@ -345,7 +367,7 @@ class TextProcessor:
             return ""
         
         # Remove excessive whitespace
-        text = re.sub(r'\s+', ' ', text)
+        text = _RE_WHITESPACE.sub(' ', text)
         text = text.strip()
         
         return text
\ No newline at end of file
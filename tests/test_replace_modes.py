@@ -1,6 +1,7 @@
 """
 Test the new replace modes functionality
 """
+import json
 import pytest
 from unittest.mock import Mock, patch, MagicMock
 import sys
@@ -25,22 +26,25 @@ def notion_client(mock_config):
     """Create NotionClient instance with mocked config"""
     return NotionClient(mock_config)
 
+def _response(status_code=200, data=None, **kwargs):
+    """Mock response whose JSON body is data, for either decoder the client uses"""
+    return Mock(status_code=status_code, content=json.dumps(data).encode(),
+                json=Mock(return_value=data), **kwargs)
+
 class TestReplaceModes:
     """Test new replace functionality"""
     
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_get_page_blocks_success(self, mock_get, notion_client):
         """Test getting page blocks successfully"""
-        mock_response = Mock()
-        mock_response.status_code = 200
-        mock_response.json.return_value = {
+        mock_response = _response(data={
             'results': [
                 {'id': 'block-1', 'type': 'paragraph'},
                 {'id': 'block-2', 'type': 'heading_1'},
                 {'id': 'block-3', 'type': 'child_page'}
             ],
             'has_more': False
-        }
+        })
         mock_get.return_value = mock_response
         
         blocks = notion_client.get_page_blocks('test-page-id')
@@ -49,7 +53,22 @@ class TestReplaceModes:
         assert blocks[0]['id'] == 'block-1'
         assert blocks[2]['type'] == 'child_page'
     
-    @patch('requests.delete')
+    @patch('requests.Session.get')
+    def test_get_page_blocks_follows_cursor(self, mock_get, notion_client):
+        """Test that every page of results is fetched in order"""
+        first = _response(data={
+            'results': [{'id': 'block-1'}], 'has_more': True, 'next_cursor': 'cursor-2'
+        })
+        second = _response(data={'results': [{'id': 'block-2'}], 'has_more': False})
+        mock_get.side_effect = [first, second]
+        
+        blocks = notion_client.get_page_blocks('test-page-id')
+        
+        assert [b['id'] for b in blocks] == ['block-1', 'block-2']
+        assert 'start_cursor' not in mock_get.call_args_list[0].kwargs['params']
+        assert mock_get.call_args_list[1].kwargs['params']['start_cursor'] == 'cursor-2'
+    
+    @patch('requests.Session.delete')
     def test_delete_blocks_success(self, mock_delete, notion_client):
         """Test deleting blocks successfully"""
         mock_response = Mock()
@@ -62,18 +81,14 @@ class TestReplaceModes:
         assert len(result['errors']) == 0
         assert mock_delete.call_count == 2
     
-    @patch('requests.delete')
+    @patch('requests.Session.delete')
     def test_delete_blocks_with_errors(self, mock_delete, notion_client):
         """Test deleting blocks with some failures"""
         def mock_delete_response(url, **kwargs):
-            mock_response = Mock()
             if 'block-1' in url:
-                mock_response.status_code = 200
-            else:
-                mock_response.status_code = 404
-                mock_response.json.return_value = {'message': 'Block not found'}
-                mock_response.headers = {'content-type': 'application/json'}
-            return mock_response
+                return Mock(status_code=200)
+            return _response(404, {'message': 'Block not found'},
+                             headers={'content-type': 'application/json'})
         
         mock_delete.side_effect = mock_delete_response
         
@@ -82,8 +97,27 @@ class TestReplaceModes:
         assert len(result['deleted']) == 1
         assert len(result['errors']) == 1
         assert result['errors'][0]['block_id'] == 'block-2'
+
+    @patch('requests.Session.delete')
+    def test_delete_blocks_run_concurrently(self, mock_delete, notion_client):
+        """Test deletes overlap but results keep the requested order"""
+        import threading
+        from narko.notion.client import DELETE_WORKERS
+
+        barrier = threading.Barrier(DELETE_WORKERS, timeout=5)
+
+        def slow_delete(url, **kwargs):
+            barrier.wait()  # Only returns once DELETE_WORKERS deletes are in flight
+            return Mock(status_code=200)
+
+        mock_delete.side_effect = slow_delete
+        block_ids = [f'block-{i}' for i in range(DELETE_WORKERS * 2)]
+
+        result = notion_client.delete_blocks(block_ids)
+
+        assert result == {'deleted': block_ids, 'errors': []}
     
-    @patch('requests.patch')
+    @patch('requests.Session.patch')
     @patch('narko.notion.client.NotionClient.delete_blocks') 
     @patch('narko.notion.client.NotionClient.get_page_blocks')
     def test_replace_all_blocks_success(self, mock_get_blocks, mock_delete, mock_patch, notion_client):
@@ -96,9 +130,7 @@ class TestReplaceModes:
         mock_delete.return_value = {'deleted': ['old-block-1', 'old-block-2'], 'errors': []}
         
         # Mock the PATCH request for adding new blocks
-        mock_response = Mock()
-        mock_response.status_code = 200
-        mock_response.json.return_value = {'results': [{'id': 'new-block-1'}]}
+        mock_response = _response(data={'results': [{'id': 'new-block-1'}]})
         mock_patch.return_value = mock_response
         
         new_blocks = [{'type': 'paragraph', 'paragraph': {'rich_text': [{'text': {'content': 'New content'}}]}}]
@@ -112,7 +144,7 @@ class TestReplaceModes:
         mock_delete.assert_called_once_with(['old-block-1', 'old-block-2'])
         mock_patch.assert_called_once()
     
-    @patch('requests.patch')
+    @patch('requests.Session.patch')
     @patch('narko.notion.client.NotionClient.delete_blocks')
     @patch('narko.notion.client.NotionClient.get_page_blocks')
     def test_replace_content_blocks_preserves_subpages(self, mock_get_blocks, mock_delete, mock_patch, notion_client):
@@ -128,9 +160,7 @@ class TestReplaceModes:
         mock_delete.return_value = {'deleted': ['content-1', 'content-2', 'content-3'], 'errors': []}
         
         # Mock the PATCH request for adding new blocks
-        mock_response = Mock()
-        mock_response.status_code = 200
-        mock_response.json.return_value = {'results': [{'id': 'new-content-1'}]}
+        mock_response = _response(data={'results': [{'id': 'new-content-1'}]})
         mock_patch.return_value = mock_response
         
         new_blocks = [{'type': 'paragraph', 'paragraph': {'rich_text': [{'text': {'content': 'New content'}}]}}]
@@ -150,6 +180,195 @@ class TestReplaceModes:
         assert 'subpage-1' not in delete_call_args
         assert 'subpage-2' not in delete_call_args
 
+class TestBlockBatching:
+    """Test that block uploads past Notion's 100-child limit are batched"""
+
+    @staticmethod
+    def _blocks(count):
+        return [{'type': 'paragraph', 'paragraph': {'rich_text': [{'text': {'content': f'Block {i}'}}]}}
+                for i in range(count)]
+
+    @staticmethod
+    def _children(call):
+        return json.loads(call.kwargs['data'])['children']
+
+    @patch('requests.Session.patch')
+    @patch('requests.Session.post')
+    def test_create_page_appends_remaining_blocks(self, mock_post, mock_patch, notion_client):
+        """Test create_page sends the first 100 blocks and appends the rest"""
+        mock_post.return_value = _response(data={'id': 'new-page'})
+        mock_patch.return_value = _response(data={'results': []})
+
+        result = notion_client.create_page('parent-id', 'Title', self._blocks(250))
+
+        assert result['id'] == 'new-page'
+        assert len(self._children(mock_post.call_args)) == 100
+        assert [len(self._children(c)) for c in mock_patch.call_args_list] == [100, 50]
+        assert all('/blocks/new-page/children' in c.args[0] for c in mock_patch.call_args_list)
+
+    @patch('requests.Session.patch')
+    @patch('requests.Session.post')
+    def test_create_page_small_document_single_request(self, mock_post, mock_patch, notion_client):
+        """Test documents within the limit need no follow-up appends"""
+        mock_post.return_value = _response(data={'id': 'new-page'})
+
+        notion_client.create_page('parent-id', 'Title', self._blocks(100))
+
+        mock_post.assert_called_once()
+        mock_patch.assert_not_called()
+
+    @patch('requests.Session.patch')
+    @patch('requests.Session.post')
+    def test_create_page_consumes_block_iterator(self, mock_post, mock_patch, notion_client):
+        """Test create_page accepts a lazy block iterator"""
+        mock_post.return_value = _response(data={'id': 'new-page'})
+        mock_patch.return_value = _response(data={'results': []})
+
+        notion_client.create_page('parent-id', 'Title', iter(self._blocks(150)))
+
+        assert len(self._children(mock_post.call_args)) == 100
+        assert len(self._children(mock_patch.call_args)) == 50
+
+    @patch('requests.Session.patch')
+    def test_invalid_batch_does_not_end_append(self, mock_patch, notion_client):
+        """Test blocks after a full batch of typeless blocks are still sent"""
+        mock_patch.return_value = _response(data={'results': []})
+        divider = {'type': 'divider', 'divider': {}}
+
+        notion_client.append_blocks('page-id', [{'foo': 1}] * 100 + [divider] * 5)
+
+        assert [self._children(c) for c in mock_patch.call_args_list] == [[divider] * 5]
+
+    @patch('requests.Session.patch')
+    def test_payload_sent_as_compact_utf8_json(self, mock_patch, notion_client):
+        """Test request bodies are pre-encoded UTF-8 JSON bytes"""
+        mock_patch.return_value = _response(data={'results': []})
+        blocks = [{'type': 'paragraph', 'paragraph': {'rich_text': [{'text': {'content': 'café ✓'}}]}}]
+
+        notion_client.append_blocks('page-id', blocks)
+
+        body = mock_patch.call_args.kwargs['data']
+        assert isinstance(body, bytes)
+        assert json.loads(body) == {'children': blocks}
+        assert 'json' not in mock_patch.call_args.kwargs
+
+    @patch('narko.notion.client.orjson', None)
+    @patch('requests.Session.get')
+    def test_responses_decoded_without_orjson(self, mock_get, notion_client):
+        """Test responses fall back to requests' JSON decoding"""
+        mock_get.return_value = Mock(status_code=200, json=Mock(return_value={'results': [{'id': 'b'}]}))
+
+        assert notion_client.get_page_blocks('page-id') == [{'id': 'b'}]
+
+    def test_client_reuses_one_session(self, notion_client):
+        """Test requests go through a pooled session carrying auth headers"""
+        assert notion_client.session.headers['Authorization'] == 'Bearer test_api_key'
+        assert notion_client.session.headers['Notion-Version'] == '2022-06-28'
+
+    def test_session_pool_sized_for_concurrency(self, notion_client):
+        """Test the pool holds enough connections for concurrent callers"""
+        from narko.notion.client import POOL_SIZE
+
+        adapter = notion_client.session.get_adapter('https://api.notion.com/v1')
+        assert adapter._pool_maxsize == POOL_SIZE
+        assert 'POST' not in adapter.max_retries.allowed_methods
+
+    def test_context_manager_closes_session(self, mock_config):
+        """Test leaving the with block releases pooled connections"""
+        with patch('requests.Session.close') as mock_close:
+            with NotionClient(mock_config):
+                pass
+        mock_close.assert_called_once()
+
+class TestExternalImporter:
+    """Test importing files from external URLs"""
+
+    @patch('requests.Session.post')
+    def test_external_importer_shares_client_session(self, mock_post, mock_config, notion_client):
+        """Test an injected session is used for external imports"""
+        from narko.notion.uploader import ExternalImporter
+
+        mock_post.return_value = Mock(status_code=400, text='bad request')
+        importer = ExternalImporter(mock_config, session=notion_client.session)
+
+        result = importer.import_file('https://example.com/a.png')
+
+        assert importer.session is notion_client.session
+        assert 'error' in result
+        mock_post.assert_called_once()
+
+    @patch('narko.notion.uploader.time.sleep')
+    @patch('requests.Session.get')
+    @patch('requests.Session.post')
+    def test_external_import_polls_with_backoff(self, mock_post, mock_get, mock_sleep, mock_config):
+        """Test polling waits longer after each pending status"""
+        from narko.notion.uploader import ExternalImporter, POLL_FIRST_DELAY
+
+        mock_post.return_value = Mock(status_code=200, json=Mock(return_value={'id': 'file-1'}))
+        pending = Mock(status_code=200, json=Mock(return_value={'status': 'pending'}))
+        done = Mock(status_code=200, json=Mock(return_value={'status': 'uploaded', 'content_length': 3}))
+        mock_get.side_effect = [pending, pending, pending, done]
+
+        result = ExternalImporter(mock_config).import_file('https://example.com/a.png')
+
+        assert result['success'] and result['file_id'] == 'file-1'
+        delays = [c.args[0] for c in mock_sleep.call_args_list]
+        assert delays == [POLL_FIRST_DELAY, POLL_FIRST_DELAY * 2, POLL_FIRST_DELAY * 4]
+
+class TestExtractPageId:
+    """Test page ID extraction from URLs and IDs"""
+
+    PAGE_ID = '01234567-89ab-cdef-0123-456789abcdef'
+
+    @pytest.mark.parametrize("value", [
+        '01234567-89ab-cdef-0123-456789abcdef',
+        '0123456789abcdef0123456789abcdef',
+        'https://www.notion.so/My-Page-0123456789abcdef0123456789abcdef',
+        'https://www.notion.so/ws/01234567-89ab-cdef-0123-456789abcdef?pvs=4',
+    ])
+    def test_id_extracted_and_dashed(self, notion_client, value):
+        assert notion_client.extract_page_id(value) == self.PAGE_ID
+
+    @pytest.mark.parametrize("value", ['', None, 'not-a-page'])
+    def test_unrecognised_input_returned_unchanged(self, notion_client, value):
+        assert notion_client.extract_page_id(value) == value
+
+class TestRateLimits:
+    """Test that rate-limited (429) requests are retried"""
+
+    @pytest.fixture(autouse=True)
+    def retry_config(self, mock_config):
+        mock_config.max_retries = 2
+        mock_config.base_retry_delay = 0.5
+
+    @staticmethod
+    def _response(status_code, headers=None):
+        return _response(status_code, {'results': []}, headers=headers or {})
+
+    @patch('narko.notion.client.time.sleep')
+    @patch('requests.Session.patch')
+    def test_retry_after_is_honoured(self, mock_patch, mock_sleep, notion_client):
+        """Test a 429 waits for Retry-After and resends the same batch"""
+        mock_patch.side_effect = [self._response(429, {'Retry-After': '3'}), self._response(200)]
+
+        notion_client.append_blocks('page-id', TestBlockBatching._blocks(5))
+
+        mock_sleep.assert_called_once_with(3.0)
+        assert mock_patch.call_count == 2
+        assert mock_patch.call_args_list[0] == mock_patch.call_args_list[1]
+
+    @patch('narko.notion.client.time.sleep')
+    @patch('requests.Session.patch')
+    def test_backoff_without_retry_after(self, mock_patch, mock_sleep, notion_client):
+        """Test retries back off exponentially and give up after max_retries"""
+        mock_patch.return_value = self._response(429)
+
+        with pytest.raises(Exception, match='429'):
+            notion_client.append_blocks('page-id', TestBlockBatching._blocks(5))
+
+        assert [c.args[0] for c in mock_sleep.call_args_list] == [0.5, 1.0]
+        assert mock_patch.call_count == 3
+
 class TestCLIIntegration:
     """Test CLI integration with new modes"""
     
@@ -0,0 +1,94 @@
+"""
+Unit tests for file processing in the narko application.
+"""
+import pytest
+import sys
+from pathlib import Path
+from unittest.mock import Mock, patch
+
+# Add src to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from narko.app import NarkoApp
+
+
+@pytest.fixture
+def app(monkeypatch, tmp_path):
+    """App working in a temporary directory, with a mocked uploader"""
+    monkeypatch.setenv("NOTION_API_KEY", "test_key")
+    monkeypatch.setenv("NOTION_IMPORT_ROOT", "test_root")
+    monkeypatch.setenv("NARKO_SKIP_DOTENV", "1")
+    monkeypatch.chdir(tmp_path)
+
+    app = NarkoApp(upload_files=True)
+    app.converter.file_uploader = Mock()
+    return app
+
+
+@pytest.mark.unit
+class TestBlockCaching:
+    """Test which converted documents are reused from the block cache"""
+
+    def test_self_contained_document_cached(self, app, tmp_path):
+        (tmp_path / "doc.md").write_text("# Title\n\nText\n")
+
+        with patch.object(app.converter, "convert", wraps=app.converter.convert) as mock_convert:
+            first = app.process_file("doc.md")
+            second = app.process_file("doc.md")
+
+        mock_convert.assert_called_once()
+        assert second["blocks"] == first["blocks"]
+
+    def test_failed_upload_retried_on_next_run(self, app, tmp_path):
+        (tmp_path / "doc.md").write_text("![image](pic.png)\n")
+        (tmp_path / "pic.png").write_bytes(b"png")
+        uploader = app.converter.file_uploader
+
+        uploader.upload_many_sync.return_value = [{"error": "timeout"}]
+        failed = app.process_file("doc.md")["blocks"][0]
+        assert failed["paragraph"]["rich_text"][0]["text"]["content"] == "[File upload failed: pic.png]"
+
+        uploader.upload_many_sync.return_value = [{"file_id": "id-1"}]
+        block = app.process_file("doc.md")["blocks"][0]
+        assert block["image"]["file_upload"] == {"id": "id-1"}
+
+    def test_missing_file_picked_up_once_created(self, app, tmp_path):
+        (tmp_path / "doc.md").write_text("![image](pic.png)\n")
+
+        block = app.process_file("doc.md")["blocks"][0]
+        assert block["image"]["external"] == {"url": "pic.png"}
+
+        (tmp_path / "pic.png").write_bytes(b"png")
+        app.converter.file_uploader.upload_many_sync.return_value = [{"file_id": "id-1"}]
+        block = app.process_file("doc.md")["blocks"][0]
+        assert block["image"]["file_upload"] == {"id": "id-1"}
+
+
+@pytest.mark.unit
+class TestProcessMany:
+    """Test converting and importing several files at once"""
+
+    @pytest.fixture
+    def files(self, tmp_path):
+        paths = []
+        for name in ("a.md", "b.md", "c.md"):
+            (tmp_path / name).write_text(f"# {name}\n")
+            paths.append(name)
+        return paths
+
+    def test_converts_without_importing(self, app, files):
+        with patch.object(NarkoApp, "import_to_notion") as mock_import:
+            results = app.process_many(files + ["missing.md"], "parent-id", do_import=False, concurrency=2)
+
+        mock_import.assert_not_called()
+        by_path = {r["file_path"]: r for r in results}
+        assert set(by_path) == set(files) | {"missing.md"}
+        assert "error" in by_path["missing.md"]
+        assert by_path["a.md"]["blocks"][0]["type"] == "heading_1"
+
+    def test_imports_each_converted_file(self, app, files):
+        with patch.object(NarkoApp, "import_to_notion", side_effect=lambda r: {"url": f"u/{r['title']}"}):
+            results = app.process_many(files, "parent-id", do_import=True, concurrency=2)
+
+        assert sorted(r["response"]["url"] for r in results) == ["u/a", "u/b", "u/c"]
+        assert all(r["parent_id"] == "parent-id" for r in results)
@@ -0,0 +1,109 @@
+"""
+Unit tests for on-disk caches.
+"""
+import os
+import json
+import time
+import datetime
+import pytest
+import sys
+from pathlib import Path
+from unittest.mock import patch
+
+# Add src to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from narko.config import Config
+from narko.utils import BlockCache, UploadCache
+
+
+@pytest.fixture
+def block_cache(tmp_path):
+    """Block cache writing under a temporary directory"""
+    config = Config.create_minimal()
+    config.blocks_cache_dir = str(tmp_path / "blocks")
+    return BlockCache(config)
+
+
+@pytest.fixture
+def upload_cache(tmp_path):
+    """Upload cache backed by a temporary JSON file"""
+    config = Config.create_minimal()
+    config.cache_file = str(tmp_path / "upload_cache.json")
+    return UploadCache(config)
+
+
+def _entry(file_id):
+    return {"file_id": file_id, "upload_timestamp": datetime.datetime.now().isoformat()}
+
+
+@pytest.mark.unit
+class TestUploadCache:
+    """Test the upload result cache"""
+
+    def test_round_trip(self, upload_cache):
+        assert upload_cache.get("abc") is None
+
+        upload_cache.set("abc", _entry("file-1"))
+        assert upload_cache.get("abc")["file_id"] == "file-1"
+
+    def test_file_read_once_while_unchanged(self, upload_cache):
+        upload_cache.set("abc", _entry("file-1"))
+
+        with patch("narko.utils.cache.json.load") as mock_load:
+            for _ in range(3):
+                assert upload_cache.get("abc")["file_id"] == "file-1"
+        mock_load.assert_not_called()
+
+    def test_external_changes_are_picked_up(self, upload_cache):
+        upload_cache.set("abc", _entry("file-1"))
+
+        with open(upload_cache.cache_file, "w") as f:
+            json.dump({"abc": _entry("file-2"), "padding": {}}, f)
+
+        assert upload_cache.get("abc")["file_id"] == "file-2"
+
+    def test_returned_entry_is_a_copy(self, upload_cache):
+        upload_cache.set("abc", _entry("file-1"))
+        upload_cache.get("abc")["from_cache"] = True
+
+        assert "from_cache" not in upload_cache.get("abc")
+
+
+@pytest.mark.unit
+class TestBlockCache:
+    """Test the converted-blocks cache"""
+
+    BLOCKS = [{"type": "paragraph", "paragraph": {"rich_text": [{"text": {"content": "Hi"}}]}}]
+
+    def test_round_trip(self, block_cache):
+        key = BlockCache.source_hash(b"# Hi\n")
+        assert block_cache.get(key) is None
+
+        block_cache.set(key, self.BLOCKS)
+        assert block_cache.get(key) == self.BLOCKS
+
+    def test_hash_depends_on_package_version(self):
+        with patch("narko.utils.cache.__version__", "0.0.0-test"):
+            other = BlockCache.source_hash(b"a")
+        assert other != BlockCache.source_hash(b"a")
+
+    def test_hash_depends_on_source(self):
+        assert BlockCache.source_hash(b"a") != BlockCache.source_hash(b"b")
+        assert BlockCache.source_hash(b"a") == BlockCache.source_hash(b"a")
+
+    def test_expired_entries_ignored(self, block_cache):
+        key = BlockCache.source_hash(b"old")
+        block_cache.set(key, self.BLOCKS)
+
+        stale = time.time() - block_cache.ttl_seconds - 60
+        os.utime(os.path.join(block_cache.cache_dir, f"{key}.json"), (stale, stale))
+        assert block_cache.get(key) is None
+
+    def test_disabled_with_empty_dir(self):
+        config = Config.create_minimal()
+        config.blocks_cache_dir = ""
+        cache = BlockCache(config)
+
+        cache.set("key", self.BLOCKS)
+        assert cache.get("key") is None
@@ -0,0 +1,56 @@
+"""
+Unit tests for the command line interface.
+"""
+import pytest
+import sys
+from pathlib import Path
+from unittest.mock import patch
+
+# Add src to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from narko.cli import main
+
+
+@pytest.fixture
+def workdir(monkeypatch, tmp_path):
+    """Environment and working directory holding a document that links a local file"""
+    monkeypatch.setenv("NOTION_API_KEY", "test_key")
+    monkeypatch.setenv("NOTION_IMPORT_ROOT", "test_root")
+    monkeypatch.setenv("NARKO_SKIP_DOTENV", "1")
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "doc.md").write_text("# Doc\n\n![image](pic.png)\n")
+    (tmp_path / "pic.png").write_bytes(b"png")
+    return tmp_path
+
+
+@pytest.mark.unit
+class TestLocalUploads:
+    """Test that local files are only uploaded for an import"""
+
+    @pytest.mark.parametrize("extra", [[], ["--upload-files"]])
+    def test_test_mode_never_uploads(self, workdir, monkeypatch, capsys, extra):
+        monkeypatch.setattr(sys, "argv", ["narko", "--file", "doc.md", "--test", *extra])
+
+        with patch("narko.notion.uploader.FileUploader.upload_many_sync") as mock_many, \
+                patch("narko.notion.uploader.FileUploader.upload_sync") as mock_one:
+            main()
+
+        mock_many.assert_not_called()
+        mock_one.assert_not_called()
+        assert "[Local file not uploaded: pic.png]" in capsys.readouterr().out
+
+
+@pytest.mark.unit
+class TestArguments:
+    """Test command line validation"""
+
+    @pytest.mark.parametrize("value", ["0", "-2", "many"])
+    def test_concurrency_must_be_positive(self, monkeypatch, capsys, value):
+        monkeypatch.setattr(sys, "argv", ["narko", "--files", "*.md", "--concurrency", value])
+
+        with pytest.raises(SystemExit) as exc_info:
+            main()
+
+        assert exc_info.value.code == 2
+        assert "--concurrency" in capsys.readouterr().err
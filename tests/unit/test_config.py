@@ -0,0 +1,97 @@
+"""
+Unit tests for configuration defaults.
+"""
+import os
+import pytest
+import sys
+from dataclasses import fields
+from pathlib import Path
+from unittest.mock import patch
+
+# Add src to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from narko.config import Config, _load_dotenv
+
+
+@pytest.fixture
+def env_config(monkeypatch):
+    """Config built from (fake) environment variables"""
+    monkeypatch.setenv("NOTION_API_KEY", "test_key")
+    monkeypatch.setenv("NOTION_IMPORT_ROOT", "test_root")
+    return Config.from_env()
+
+
+@pytest.mark.unit
+class TestConfigDefaults:
+    """Test that every way of building a Config shares one set of defaults"""
+
+    @pytest.mark.parametrize("name", [
+        "notion_supported_extensions",
+        "unsupported_text_extensions",
+        "supported_file_types",
+        "embedding_enabled_types",
+        "text_extraction_types",
+        "image_analysis_types",
+        "mime_type_mapping",
+    ])
+    def test_minimal_matches_env_defaults(self, env_config, name):
+        assert getattr(Config.create_minimal(), name) is getattr(env_config, name)
+
+    def test_minimal_scalars_match_env_defaults(self, env_config):
+        minimal = Config.create_minimal()
+        for f in fields(Config):
+            if f.name not in ("notion_api_key", "notion_import_root"):
+                assert getattr(minimal, f.name) == getattr(env_config, f.name), f.name
+        assert (minimal.notion_api_key, minimal.notion_import_root) == ("test_key", "test_root")
+
+    def test_markdown_uploads_use_text_workaround(self, env_config):
+        # Notion does not accept .md uploads: they go up as .txt (text/plain)
+        assert ".md" not in env_config.mime_type_mapping
+        assert env_config.needs_extension_workaround(".md")
+
+    @pytest.mark.skipif(sys.version_info < (3, 10), reason="dataclass slots need Python 3.10+")
+    def test_instances_are_slotted(self, env_config):
+        assert not hasattr(env_config, "__dict__")
+        assert not hasattr(Config.create_minimal(), "__dict__")
+
+    def test_mime_type_lookup(self, env_config):
+        assert env_config.get_mime_type(".PNG") == "image/png"
+        assert env_config.get_mime_type(".unknown") == "application/octet-stream"
+
+    @pytest.mark.parametrize("ext", [".png", ".PNG", ".Png"])
+    def test_extension_checks_ignore_case(self, env_config, ext):
+        assert env_config.is_supported_file_type(ext)
+        assert env_config.is_notion_native_support(ext)
+        assert not env_config.needs_extension_workaround(ext)
+
+
+@pytest.mark.unit
+class TestDotenv:
+    """Test when the .env file is read"""
+
+    @pytest.fixture(autouse=True)
+    def fresh_load(self):
+        _load_dotenv.cache_clear()
+        yield
+        _load_dotenv.cache_clear()
+
+    def test_skipped_when_env_complete(self, env_config):
+        with patch("dotenv.find_dotenv") as mock_find:
+            Config.from_env()
+        mock_find.assert_not_called()
+
+    def test_skip_variable_bypasses_lookup(self, monkeypatch):
+        monkeypatch.setenv("NARKO_SKIP_DOTENV", "1")
+        with patch("dotenv.find_dotenv") as mock_find:
+            _load_dotenv()
+        mock_find.assert_not_called()
+
+    def test_loads_from_working_directory(self, monkeypatch, tmp_path):
+        (tmp_path / ".env").write_text("NARKO_DOTENV_TEST=loaded\n")
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.delenv("NARKO_SKIP_DOTENV", raising=False)
+        monkeypatch.delenv("NARKO_DOTENV_TEST", raising=False)
+
+        _load_dotenv()
+        assert os.environ.pop("NARKO_DOTENV_TEST") == "loaded"
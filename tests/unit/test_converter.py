@@ -0,0 +1,375 @@
+"""
+Unit tests for the Marko AST -> Notion block converter.
+"""
+import os
+import pytest
+import sys
+import threading
+from pathlib import Path
+from unittest.mock import Mock, patch
+
+# Add src to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from narko.config import Config
+from narko.converter import NotionConverter, RICH_TEXT_LIMIT, _chunk_text
+from narko.extensions import get_markdown
+
+
+@pytest.fixture
+def converter():
+    """Converter with mocked uploader/importer, uploading local files"""
+    return NotionConverter(Config.create_minimal(), Mock(), Mock(), upload_files=True)
+
+
+@pytest.fixture
+def convert(converter):
+    """Parse markdown and convert it to Notion blocks"""
+    def _convert(source):
+        return list(converter.convert(get_markdown().parse(source)))
+    return _convert
+
+
+@pytest.mark.unit
+class TestChunkText:
+    """Test splitting long text to Notion's rich text limit"""
+
+    def test_short_text_single_chunk(self):
+        assert _chunk_text("short") == ["short"]
+
+    def test_chunks_respect_limit_and_are_lossless(self):
+        text = "\n".join(f"    line {i} = value" for i in range(500))
+        chunks = _chunk_text(text, limit=100)
+
+        assert len(chunks) > 1
+        assert all(len(chunk) <= 100 for chunk in chunks)
+        assert "".join(chunks) == text
+
+    def test_chunks_prefer_newline_boundaries(self):
+        text = "a" * 60 + "\n" + "b" * 60
+        assert _chunk_text(text, limit=100) == ["a" * 60 + "\n", "b" * 60]
+
+    def test_hard_split_without_newline(self):
+        text = "x" * 250
+        assert _chunk_text(text, limit=100) == ["x" * 100, "x" * 100, "x" * 50]
+
+
+@pytest.mark.unit
+class TestCodeBlocks:
+    """Test code block conversion"""
+
+    def test_fenced_code_content_is_text(self, convert):
+        blocks = convert("```python\nprint('hi')\n```\n")
+
+        assert blocks[0]["type"] == "code"
+        assert blocks[0]["code"]["rich_text"][0]["text"]["content"] == "print('hi')\n"
+
+    def test_long_code_is_split_into_rich_text_items(self, convert):
+        body = "x = 1\n" * 1000
+        blocks = convert(f"```\n{body}```\n")
+        rich_text = blocks[0]["code"]["rich_text"]
+
+        assert len(rich_text) > 1
+        assert all(len(rt["text"]["content"]) <= RICH_TEXT_LIMIT for rt in rich_text)
+        assert "".join(rt["text"]["content"] for rt in rich_text) == body
+
+    def test_indented_code_matches_fenced(self, convert):
+        assert convert("    x = 1\n") == convert("```\nx = 1\n```\n")
+
+    @pytest.mark.parametrize("fence,expected", [
+        ("python", "python"),
+        ("py", "python"),
+        ("JS", "javascript"),
+        ("cpp", "c++"),
+        ("", "plain text"),
+        ("not-a-language", "plain text"),
+    ])
+    def test_language_mapped_to_notion_names(self, convert, fence, expected):
+        blocks = convert(f"```{fence}\ncode\n```\n")
+        assert blocks[0]["code"]["language"] == expected
+
+
+@pytest.mark.unit
+class TestRichText:
+    """Test inline rich text extraction"""
+
+    def test_short_inlines_keep_annotations(self, convert):
+        rich_text = convert("plain **bold** [link](https://example.com)\n")[0]["paragraph"]["rich_text"]
+
+        assert rich_text[0] == {"type": "text", "text": {"content": "plain "}}
+        assert rich_text[1]["annotations"] == {"bold": True}
+        assert rich_text[3]["text"]["link"] == {"url": "https://example.com"}
+
+    def test_code_span_is_code_annotated(self, convert):
+        rich_text = convert("run `make test` now\n")[0]["paragraph"]["rich_text"]
+        assert rich_text[1] == {"type": "text", "text": {"content": "make test"}, "annotations": {"code": True}}
+
+    def test_long_text_split_to_limit(self, convert):
+        body = "word " * 1000
+        rich_text = convert(f"**{body.strip()}**\n")[0]["paragraph"]["rich_text"]
+
+        assert len(rich_text) > 1
+        assert all(len(rt["text"]["content"]) <= RICH_TEXT_LIMIT for rt in rich_text)
+        assert all(rt["annotations"] == {"bold": True} for rt in rich_text)
+        assert "".join(rt["text"]["content"] for rt in rich_text) == body.strip()
+
+
+@pytest.mark.unit
+class TestPlainText:
+    """Test plain text extraction from inline trees"""
+
+    def test_nested_inlines_flattened_in_order(self, converter):
+        paragraph = get_markdown().parse("a **b *c* d** e\n").children[0]
+        assert converter._extract_plain_text(paragraph.children) == "a b c d e"
+
+    def test_deep_nesting_does_not_recurse(self, converter):
+        class Node:
+            def __init__(self, children):
+                self.children = children
+
+        node = Node("leaf")
+        for _ in range(5000):
+            node = Node([node])
+
+        assert converter._extract_plain_text([node]) == "leaf"
+
+
+@pytest.mark.unit
+class TestEmbeddableUrls:
+    """Test which link targets become embeds"""
+
+    @pytest.mark.parametrize("url", [
+        "https://www.youtube.com/watch?v=abc",
+        "https://youtu.be/abc",
+        "https://gist.github.com/user/123",
+        "https://GitHub.com:443/org/repo",
+        "https://x.com/user/status/1",
+    ])
+    def test_embeddable_hosts(self, converter, url):
+        assert converter._is_embeddable_url(url)
+
+    @pytest.mark.parametrize("url", [
+        "https://www.dropbox.com/s/file",  # ends in "x.com" but is not x.com
+        "https://notgithub.com/repo",
+        "https://example.com/?next=youtube.com",
+        "docs/local.md",
+    ])
+    def test_other_hosts(self, converter, url):
+        assert not converter._is_embeddable_url(url)
+
+
+@pytest.mark.unit
+class TestLocalFiles:
+    """Test local file detection"""
+
+    def test_existence_checked_once_per_path(self, converter, tmp_path):
+        asset = tmp_path / "a.png"
+        asset.write_bytes(b"png")
+
+        with patch("narko.converter.os.path.exists", wraps=lambda p: p == str(asset)) as mock_exists:
+            for _ in range(3):
+                assert converter._is_local_file(str(asset))
+                assert not converter._is_local_file("missing.png")
+        assert mock_exists.call_count == 2
+
+    @pytest.mark.parametrize("url", ["https://a.b/c.png", "data:image/png;base64,AA", "mailto:me@x.y"])
+    def test_urls_skip_filesystem(self, converter, url):
+        with patch("narko.converter.os.path.exists") as mock_exists:
+            assert not converter._is_local_file(url)
+        mock_exists.assert_not_called()
+
+
+@pytest.mark.unit
+class TestFileBlocks:
+    """Test ![file](...) block conversion"""
+
+    @pytest.mark.parametrize("name,block_type", [
+        ("clip.MP4", "video"), ("song.flac", "audio"), ("doc.pdf", "pdf"),
+        ("pic.jpeg", "image"), ("data.csv", "file"), ("scan.tiff", "image"), ("notes", "file"),
+    ])
+    def test_type_inferred_from_extension(self, convert, name, block_type):
+        block = convert(f"![file](https://example.com/{name})\n")[0]
+
+        assert block["type"] == block_type
+        assert block[block_type]["external"] == {"url": f"https://example.com/{name}"}
+
+
+@pytest.mark.unit
+class TestLocalUploads:
+    """Test uploading local files referenced by a document"""
+
+    def test_each_distinct_file_uploaded_once(self, converter, convert, tmp_path):
+        paths = []
+        for name in ("a.png", "b.pdf"):
+            (tmp_path / name).write_bytes(name.encode())
+            paths.append(str(tmp_path / name))
+        converter.file_uploader.upload_many_sync.side_effect = lambda paths: [
+            {"file_id": f"id-{os.path.basename(path)}"} for path in paths
+        ]
+
+        blocks = convert(f"![image]({paths[0]})\n\n![pdf:Spec]({paths[1]})\n\n![image]({paths[0]})\n")
+
+        converter.file_uploader.upload_many_sync.assert_called_once()
+        assert sorted(converter.file_uploader.upload_many_sync.call_args.args[0]) == sorted(paths)
+        converter.file_uploader.upload_sync.assert_not_called()
+        assert [b["type"] for b in blocks] == ["image", "pdf", "image"]
+        assert blocks[0]["image"]["file_upload"] == {"id": "id-a.png"}
+        assert blocks[1]["pdf"]["file_upload"] == {"id": "id-b.pdf"}
+        assert blocks[1]["pdf"]["caption"][0]["text"]["content"] == "Spec"
+
+    def test_identical_files_uploaded_once(self, converter, convert, tmp_path):
+        for name in ("logo.png", "copy.png"):
+            (tmp_path / name).write_bytes(b"same bytes")
+        converter.file_uploader.upload_many_sync.return_value = [{"file_id": "shared"}]
+
+        blocks = convert(f"![image]({tmp_path / 'logo.png'})\n\n![image]({tmp_path / 'copy.png'})\n")
+
+        assert len(converter.file_uploader.upload_many_sync.call_args.args[0]) == 1
+        assert [b["image"]["file_upload"]["id"] for b in blocks] == ["shared", "shared"]
+
+    def test_not_uploaded_unless_enabled(self, converter, convert, tmp_path):
+        (tmp_path / "a.png").write_bytes(b"data")
+        converter.upload_files = False
+
+        blocks = convert(f"![image]({tmp_path / 'a.png'})\n\n![pdf]({tmp_path / 'a.png'})\n")
+
+        assert [b["paragraph"]["rich_text"][0]["text"]["content"] for b in blocks] == [
+            f"[Local file not uploaded: {tmp_path / 'a.png'}]"
+        ] * 2
+        assert not converter.file_uploader.mock_calls
+
+    def test_failed_upload_becomes_text(self, converter, convert, tmp_path):
+        (tmp_path / "a.png").write_bytes(b"data")
+        converter.file_uploader.upload_many_sync.return_value = [{"error": "boom"}]
+
+        block = convert(f"![image]({tmp_path / 'a.png'})\n")[0]
+        assert block["paragraph"]["rich_text"][0]["text"]["content"].startswith("[File upload failed:")
+
+
+@pytest.mark.unit
+class TestMathBlocks:
+    """Test $$ block conversion"""
+
+    def test_body_becomes_expression(self, convert):
+        blocks = convert("$$\nE = mc^2  \n\\int x\n$$\n\nAfter\n")
+
+        assert blocks[0] == {"type": "equation", "equation": {"expression": "E = mc^2\n\\int x"}}
+        assert blocks[1]["type"] == "paragraph"
+
+    def test_unclosed_block_runs_to_end(self, convert):
+        assert convert("$$\nx\ny\n") == [{"type": "equation", "equation": {"expression": "x\ny"}}]
+
+
+@pytest.mark.unit
+class TestCallouts:
+    """Test callout block conversion"""
+
+    def test_title_leads_rich_text(self, convert):
+        block = convert("> [!NOTE] Heads up\n> body\n")[0]
+
+        assert block["type"] == "callout"
+        assert block["callout"]["rich_text"][0] == {
+            "type": "text", "text": {"content": "Heads up: "}, "annotations": {"bold": True}
+        }
+        assert block["callout"]["icon"] == {"type": "emoji", "emoji": "📝"}
+
+    def test_quoted_body_belongs_to_callout(self, convert):
+        blocks = convert("> [!TIP]\n> Use **this**\n\nAfter\n")
+
+        assert [b["type"] for b in blocks] == ["callout", "paragraph"]
+        assert [rt["text"]["content"] for rt in blocks[0]["callout"]["rich_text"]] == ["Use ", "this"]
+
+    @pytest.mark.parametrize("kind,emoji", [("WARNING", "⚠️"), ("tip", "💡"), ("CUSTOM", "ℹ️")])
+    def test_icon_by_type(self, convert, kind, emoji):
+        block = convert(f"> [!{kind}]\n> body\n")[0]
+        assert block["callout"]["icon"]["emoji"] == emoji
+
+    def test_paragraphs_separated_by_newline(self, convert):
+        block = convert("> [!NOTE]\n> First\n>\n> Second\n")[0]
+
+        assert [rt["text"]["content"] for rt in block["callout"]["rich_text"]] == ["First", "\n", "Second"]
+
+    def test_other_blocks_nested_as_children(self, convert):
+        block = convert("> [!WARNING]\n> Intro\n>\n> ```python\n> x = 1\n> ```\n>\n> - item\n")[0]
+
+        assert [rt["text"]["content"] for rt in block["callout"]["rich_text"]] == ["Intro"]
+        children = block["callout"]["children"]
+        assert [child["type"] for child in children] == ["code", "bulleted_list_item"]
+        assert children[0]["code"]["rich_text"][0]["text"]["content"] == "x = 1\n"
+
+
+@pytest.mark.unit
+class TestBlockDispatch:
+    """Test node type dispatch"""
+
+    def test_blank_lines_produce_no_blocks(self, convert):
+        blocks = convert("# Title\n\n\nFirst\n\n---\n\nSecond\n")
+        assert [b["type"] for b in blocks] == ["heading_1", "paragraph", "divider", "paragraph"]
+
+    def test_iter_blocks_is_lazy_and_matches_convert(self, converter):
+        ast = get_markdown().parse("# Title\n\n- one\n- two\n\nText\n")
+        blocks = converter.iter_blocks(ast)
+
+        assert next(blocks)["type"] == "heading_1"
+        assert [b["type"] for b in blocks] == ["bulleted_list_item", "bulleted_list_item", "paragraph"]
+        assert list(converter.iter_blocks(ast)) == converter.convert(ast)
+
+    def test_paragraph_children_supply_item_text(self, convert):
+        # GFM swaps in its own Paragraph subclass; it must still be recognised
+        blocks = convert("- item text\n\n> quoted text\n")
+
+        assert blocks[0]["bulleted_list_item"]["rich_text"][0]["text"]["content"] == "item text"
+        assert blocks[1]["quote"]["rich_text"][0]["text"]["content"] == "quoted text"
+
+    @pytest.mark.parametrize("level,block_type", [(1, "heading_1"), (3, "heading_3"), (6, "heading_3")])
+    def test_heading_levels(self, convert, level, block_type):
+        block = convert("#" * level + " Title\n")[0]
+        assert block == {"type": block_type, block_type: {"rich_text": [{"type": "text", "text": {"content": "Title"}}]}}
+
+    def test_task_items_keep_their_text(self, convert):
+        block = convert("- [x] Ship **it**\n")[0]
+
+        assert block["to_do"]["checked"] is True
+        assert [rt["text"]["content"] for rt in block["to_do"]["rich_text"]] == ["Ship ", "it"]
+        assert block["to_do"]["rich_text"][1]["annotations"] == {"bold": True}
+
+    def test_subclasses_resolved_once_and_cached(self, converter):
+        ast = get_markdown().parse("text\n")
+        gfm_paragraph = type(ast.children[0])
+        assert gfm_paragraph not in converter._node_dispatch
+
+        converter.convert(ast)
+        assert converter._node_dispatch[gfm_paragraph] == converter._convert_paragraph
+
+    def test_dividers_share_one_block(self, convert):
+        blocks = convert("---\n\n***\n")
+        assert blocks == [{"type": "divider", "divider": {}}] * 2
+        assert blocks[0] is blocks[1]
+
+    def test_html_block_content_is_source_text(self, convert):
+        block = convert("<div>\nhi\n</div>\n")[0]
+        assert block["paragraph"]["rich_text"][0]["text"]["content"] == "<div>\nhi\n</div>\n"
+
+    def test_unknown_node_falls_back_to_paragraph(self, converter):
+        class Mystery:
+            pass
+
+        block = converter._convert_node(Mystery())
+        assert block["type"] == "paragraph"
+        assert block["paragraph"]["rich_text"][0]["text"]["content"].startswith("[Unknown node:")
+
+
+@pytest.mark.unit
+class TestSharedParser:
+    """Test the per-thread shared Markdown parser"""
+
+    def test_reused_within_thread(self):
+        assert get_markdown() is get_markdown()
+
+    def test_separate_per_thread(self):
+        other = []
+        thread = threading.Thread(target=lambda: other.append(get_markdown()))
+        thread.start()
+        thread.join()
+
+        assert other[0] is not get_markdown()
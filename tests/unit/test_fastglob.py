@@ -0,0 +1,63 @@
+"""
+Unit tests for the scandir-based glob.
+"""
+import glob
+import os
+import pytest
+import re
+import sys
+from pathlib import Path
+
+# Add src to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from narko.utils import fastglob
+from narko.utils.fastglob import iter_glob
+
+
+@pytest.fixture
+def tree(tmp_path):
+    """Small directory tree with visible, hidden and nested files"""
+    for rel in ["a.md", "b.md", "c.txt", ".hidden.md", "sub/d.md", "sub/e.py", "sub/deep/f.md", "other/g.md"]:
+        path = tmp_path / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text("x")
+    return tmp_path
+
+
+@pytest.mark.unit
+class TestIterGlob:
+    """Test iter_glob against glob.glob"""
+
+    @pytest.mark.parametrize("pattern", [
+        "*.md",
+        "?.md",
+        "[ab].md",
+        "*/*.md",
+        "sub/*",
+        "sub/deep/f.md",
+        "missing/*.md",
+        ".*",
+        "*/",
+        "**/*.md",
+    ])
+    def test_matches_glob(self, tree, pattern):
+        full = os.path.join(str(tree), pattern)
+        assert sorted(iter_glob(full)) == sorted(glob.glob(full))
+
+    def test_relative_pattern(self, tree, monkeypatch):
+        monkeypatch.chdir(tree)
+        assert sorted(iter_glob("sub/*.md")) == sorted(glob.glob("sub/*.md"))
+
+    @pytest.mark.parametrize("pattern", ["sub/*.md", "sub\\*.md", "sub/deep\\", "*/"])
+    def test_either_separator_when_altsep_set(self, tree, monkeypatch, pattern):
+        # As on Windows, where os.altsep is '/'
+        monkeypatch.setattr(fastglob, "_SEPARATORS", ("\\", "/"))
+        monkeypatch.setattr(fastglob, "_RE_SEPARATOR", re.compile(r"[\\/]"))
+        monkeypatch.chdir(tree)
+        expected = glob.glob(pattern.replace("\\", "/"))
+        assert sorted(iter_glob(pattern)) == sorted(expected)
+
+    def test_is_lazy(self, tree):
+        matches = iter_glob(os.path.join(str(tree), "*.md"))
+        assert next(matches).endswith(".md")
@@ -0,0 +1,50 @@
+"""
+Unit tests for text processing utilities.
+"""
+import pytest
+import sys
+from pathlib import Path
+
+# Add src to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from narko.utils import TextProcessor
+
+
+@pytest.fixture
+def processor():
+    return TextProcessor()
+
+
+@pytest.mark.unit
+class TestCleanTextForEmbedding:
+    """Test markup removal before embedding"""
+
+    @pytest.mark.parametrize("source,expected", [
+        ("# Title", "Title"),
+        ("**bold** and *italic*", "bold and italic"),
+        ("***both***", "both"),
+        ("use `code` here", "use code here"),
+        ("see [the docs](https://example.com)", "see the docs"),
+        ("**[nested](https://example.com)**", "nested"),
+        ("plain prose", "plain prose"),
+    ])
+    def test_markdown_markup_removed(self, processor, source, expected):
+        assert processor.clean_text_for_embedding(source, 'md') == expected
+
+    # Bold, italic, inline code and links are stripped in that order, one pass
+    # each, so emphasis markers inside code spans are consumed first
+    @pytest.mark.parametrize("source,expected", [
+        ("use `**kwargs` and `*args`", "use *kwargs and args"),
+        ("2*3 = `x*y`", "23 = xy"),
+        ("`*a*` and *b*", "a and b"),
+    ])
+    def test_mixed_emphasis_and_code(self, processor, source, expected):
+        assert processor.clean_text_for_embedding(source, 'md') == expected
+
+    def test_code_comments_removed(self, processor):
+        assert processor.clean_text_for_embedding("x = 1 /* note */ + 2", 'js') == "x = 1  + 2"
+        assert processor.clean_text_for_embedding("x = 1 # note", 'py') == "x = 1"
+
+    def test_line_comments_removed_before_block_comments(self, processor):
+        assert processor.clean_text_for_embedding("a /* b // c */ d", 'js') == "a /* b"